@@ -1,10 +1,35 @@
 # kafka_client.py
 
+import functools
 import sys
+import time
+from typing import Any, Optional
 import Ice
 import confluent_kafka
 import json
 import remotetypes as rt
+from remotetypes import serialization
+
+# Pending responses are flushed to the brokers at least every
+# FLUSH_INTERVAL_MESSAGES produced messages or FLUSH_INTERVAL_SECONDS seconds.
+FLUSH_INTERVAL_MESSAGES = 1000
+FLUSH_INTERVAL_SECONDS = 5.0
+
+# Non-blocking consume attempts made before falling back to a consume that
+# waits up to config['poll_timeout_ms'] milliseconds (50 by default).
+EAGER_POLL_ATTEMPTS = 10
+
+# Default producer settings, tuned so librdkafka batches the responses
+# instead of sending each one as soon as it is produced. Any of them can
+# be overridden through the 'kafka_producer' section of config.json.
+PRODUCER_DEFAULTS = {
+    'linger.ms': 50,
+    'batch.size': 65536,
+    'compression.type': 'lz4',
+    'acks': '1',
+    'queue.buffering.max.messages': 100000,
+    'enable.idempotence': False,
+}
 
 class KafkaClient(Ice.Application):
     """
@@ -13,7 +38,7 @@ class KafkaClient(Ice.Application):
     remote factory proxy, creating the Kafka consumer and producer, 
     and finally delegating message processing to a separate function.
     """
-    def run(self, argv):
+    def run(self, argv: list[str]) -> int:
         """
         The run method is automatically called by Ice.Application
         after initializing the communicator. This is where we:
@@ -50,14 +75,16 @@ class KafkaClient(Ice.Application):
             # (or an equivalent interrupt signal).
             pass
         finally:
-            # Ensure that the consumer is properly closed before exiting.
+            # Ensure that the consumer is properly closed and that every
+            # pending response has been delivered before exiting.
             consumer.close()
+            producer.flush()
 
         # Return 0 to signal that the application terminated successfully.
         return 0
 
 
-def create_kafka_consumer(config):
+def create_kafka_consumer(config: dict[str, Any]) -> confluent_kafka.Consumer:
     """
     Creates and returns a confluent_kafka.Consumer object using the settings 
     from the given config dictionary. This method:
@@ -78,35 +105,54 @@ def create_kafka_consumer(config):
     return consumer
 
 
-def create_kafka_producer(config):
+def create_kafka_producer(config: dict[str, Any]) -> confluent_kafka.Producer:
     """
     Creates and returns a confluent_kafka.Producer object using the settings 
     from the given config dictionary. This method reads the bootstrap servers 
-    from config['kafka_bootstrap_servers'] to set up the Kafka producer.
+    from config['kafka_bootstrap_servers'] to set up the Kafka producer, and
+    applies the batching settings in PRODUCER_DEFAULTS, overridden by the
+    optional config['kafka_producer'] dictionary.
 
     :param config: A dictionary containing the Kafka connection parameters.
     :return: A confluent_kafka.Producer object ready to produce messages.
     """
-    return confluent_kafka.Producer({
-        'bootstrap.servers': config['kafka_bootstrap_servers']
-    })
-
-
-def consume_and_process_messages(consumer, producer, factory, config):
+    producer_config = dict(PRODUCER_DEFAULTS)
+    producer_config.update(config.get('kafka_producer', {}))
+    producer_config['bootstrap.servers'] = config['kafka_bootstrap_servers']
+    return confluent_kafka.Producer(producer_config)
+
+
+def consume_and_process_messages(
+    consumer: confluent_kafka.Consumer,
+    producer: confluent_kafka.Producer,
+    factory: Any,
+    config: dict[str, Any],
+) -> None:
     """
     The main loop responsible for consuming messages from Kafka, processing 
     them, and then publishing a response message. This function does the 
     following:
-      1. Continuously polls the consumer for new messages.
+      1. Continuously consumes batches of up to config['kafka_batch_size']
+         messages (500 by default) from the consumer (see 'consume_batch').
       2. Checks for any errors. If an error is found, raises a KafkaException.
-      3. When a valid message is received, it is assumed to contain JSON 
-         representing one or more operations (event_list).
+      3. Each valid message in the batch is assumed to contain JSON
+         representing one or more operations (event_list): either a list
+         of operations or a single operation object. Empty messages are
+         skipped.
       4. For each operation (or 'op'), the function 'hacer_evento' is called 
-         to carry out the remote operation via the factory proxy.
-      5. The results of each operation are collected into a 'message' list 
-         containing status, error messages, and/or result values.
-      6. This 'message' list is then serialized to JSON and published back 
-         to the Kafka output topic specified in config['kafka_output_topic'].
+         to start the remote operation via the factory proxy. Invocations
+         are asynchronous, so the whole batch is pipelined over the ICE
+         connection, and the replies are gathered with 'esperar_evento'
+         once every operation of the batch has been sent.
+      5. The results of every operation in the batch are collected into a
+         'message' list per message key, containing status, error messages,
+         and/or result values.
+      6. Each 'message' list is then serialized to JSON and published back
+         to the Kafka output topic specified in config['kafka_output_topic'],
+         using the same key as the requests it answers.
+         The producer is not flushed after each message: it is flushed
+         periodically (see FLUSH_INTERVAL_MESSAGES and FLUSH_INTERVAL_SECONDS)
+         and when the client shuts down.
 
     :param consumer: confluent_kafka.Consumer object used for reading messages.
     :param producer: confluent_kafka.Producer object used for sending messages.
@@ -114,59 +160,185 @@ def consume_and_process_messages(consumer, producer, factory, config):
                     to remote RList, RDict, RSet, etc.
     :param config: A dictionary holding all relevant Kafka and ICE configuration.
     """
+    # Configuration values used inside the loop are read only once.
+    output_topic = config['kafka_output_topic']
+    batch_size = config.get('kafka_batch_size', 500)
+    poll_timeout = config.get('poll_timeout_ms', 50) / 1000
+    unflushed = 0
+    last_flush = time.monotonic()
+
     while True:
-        # Attempt to read a message from the consumer.
-        msg = consumer.poll(timeout=1.0)
-        
+        # Serve the delivery callbacks of previously produced messages
+        # without blocking.
+        producer.poll(0)
+
+        # Flush periodically instead of after every produced message, so
+        # librdkafka can batch the responses sent to the brokers.
+        if unflushed and (unflushed >= FLUSH_INTERVAL_MESSAGES
+                          or time.monotonic() - last_flush >= FLUSH_INTERVAL_SECONDS):
+            producer.flush()
+            unflushed = 0
+            last_flush = time.monotonic()
+
+        # Attempt to read a whole batch of messages from the consumer
+        # in a single call, instead of one message per poll.
+        msgs = consume_batch(consumer, batch_size, poll_timeout)
+
         # If no message is available, just continue the loop.
-        if msg is None:
+        if not msgs:
             continue
-        
-        # If there's an error in the message, raise an exception.
-        if msg.error():
-            raise confluent_kafka.KafkaException(msg.error())
-        else:
+
+        # Group the results of all the operations found in this batch by the
+        # key of the message they came from, so each response envelope keeps
+        # the partition affinity of its requests.
+        responses: dict[Optional[bytes], list[dict[str, Any]]] = {}
+        # Remote invocations started for this batch, gathered once every
+        # event of the batch has been sent.
+        pending: list[tuple[list[dict[str, Any]], dict[str, Any], Any, Optional[str]]] = []
+        for msg in msgs:
+            # If there's an error in the message, raise an exception.
+            if msg.error():
+                raise confluent_kafka.KafkaException(msg.error())
+
+            # Empty payloads (e.g. tombstones) carry no operations.
+            payload = msg.value()
+            if not payload:
+                continue
+
             try:
-                event_list = json.loads(msg.value().decode())
-            except json.JSONDecodeError:
-                print(f"Invalid JSON received: {msg.value().decode()}")
+                event_list = serialization.loads(payload)
+            except serialization.JSONDecodeError:
+                print(f"Invalid JSON received: {payload.decode(errors='replace')}")
                 continue
             except Exception as e:
                 print(f"Unexpected error: {type(e).__name__}: {str(e)}")
                 continue
 
-            # Initialize a list to hold the results for all operations found in this message.
-            message = []
+            # A single operation may be sent without wrapping it in a list.
+            if isinstance(event_list, dict):
+                event_list = (event_list,)
+            elif not isinstance(event_list, list):
+                print(f"Invalid operation list received: {payload.decode(errors='replace')}")
+                continue
+
+            message = responses.get(msg.key())
+            if message is None:
+                message = responses[msg.key()] = []
+
             for op in event_list:
-                # Call the 'hacer_evento' function, which will dispatch 
-                # the correct operation to the remote object.
-                result, error = hacer_evento(factory, op)
-                
-                # Build the response for each operation:
-                if error:
-                    if op.get("id") is not None:
-                        message.append({"id": op["id"], "status": "error", "error": error})
-
-                elif result is not None:
-                    # If the operation succeeded and returned a non-null result, include it.
-                    message.append({"id": op["id"], "status": "ok", "result": result})
-                else:
-                    # If the operation succeeded but did not return a result, omit the 'result' key.
-                    message.append({"id": op["id"], "status": "ok"})
-                    
-            if message:
-                # Publish the response to the output topic and ensure 
-                # the message is flushed to Kafka.
-                producer.produce(config['kafka_output_topic'], value=json.dumps(message))
-                producer.flush()
-
-
-def get_rtype_proxy(factory, obj_type, obj_identifier):
+                # Operations that are not objects carry no 'id' to answer to.
+                if not isinstance(op, dict):
+                    print(f"Invalid operation received: {op!r}")
+                    continue
+                # Call the 'hacer_evento' function, which will start
+                # the correct operation on the remote object without
+                # waiting for its reply.
+                future, error = hacer_evento(factory, op)
+                pending.append((message, op, future, error))
+
+        # Wait for the replies of the whole batch, in the same order the
+        # invocations were sent, and build the response for each operation.
+        for message, op, future, error in pending:
+            result = None
+            if future is not None:
+                result, error = esperar_evento_con_reintento(factory, op, future)
+
+            if error:
+                if op.get("id") is not None:
+                    message.append({"id": op["id"], "status": "error", "error": error})
+
+            elif result is not None:
+                # If the operation succeeded and returned a non-null result, include it.
+                message.append({"id": op["id"], "status": "ok", "result": result})
+            else:
+                # If the operation succeeded but did not return a result, omit the 'result' key.
+                message.append({"id": op["id"], "status": "ok"})
+
+        for key, message in responses.items():
+            if not message:
+                continue
+            # Publish the responses to the output topic, one envelope per
+            # message key. Delivery is confirmed asynchronously through
+            # 'delivery_callback'.
+            producer.produce(output_topic, value=serialization.dumps(message),
+                             key=key, on_delivery=delivery_callback)
+            unflushed += 1
+        producer.poll(0)
+
+
+def consume_batch(
+    consumer: confluent_kafka.Consumer, batch_size: int, poll_timeout: float
+) -> list[confluent_kafka.Message]:
+    """
+    Reads the next batch of messages from the consumer. 'consumer.consume'
+    only returns before its timeout once the whole batch is available, so
+    the messages already fetched are first requested without blocking (up
+    to EAGER_POLL_ATTEMPTS times). Only when there are none, the consumer
+    waits for up to 'poll_timeout' seconds, so an idle client does not spin.
+
+    :param consumer: confluent_kafka.Consumer object used for reading messages.
+    :param batch_size: Maximum number of messages to return.
+    :param poll_timeout: Seconds to wait for messages when none are available.
+    :return: A (possibly empty) list of confluent_kafka.Message objects.
+    """
+    for _ in range(EAGER_POLL_ATTEMPTS):
+        msgs = consumer.consume(num_messages=batch_size, timeout=0)
+        if msgs:
+            return msgs
+    return consumer.consume(num_messages=batch_size, timeout=poll_timeout)
+
+
+def delivery_callback(err: Optional[confluent_kafka.KafkaError], msg: confluent_kafka.Message) -> None:
+    """
+    Called by the producer (from 'producer.poll' or 'producer.flush') once
+    a response message has been delivered or has definitively failed.
+
+    :param err: A confluent_kafka.KafkaError, or None if the delivery succeeded.
+    :param msg: The confluent_kafka.Message that was produced.
+    """
+    if err is not None:
+        print(f"Response delivery failed for topic {msg.topic()}: {err}")
+
+
+# Slice types resolved once at import time, so no module/class attribute
+# chain has to be walked while processing events.
+_TN_RLIST = rt.RemoteTypes.TypeName.RList
+_TN_RDICT = rt.RemoteTypes.TypeName.RDict
+_TN_RSET = rt.RemoteTypes.TypeName.RSet
+_PRX_RLIST = rt.RemoteTypes.RListPrx
+_PRX_RDICT = rt.RemoteTypes.RDictPrx
+_PRX_RSET = rt.RemoteTypes.RSetPrx
+
+# Maps every supported 'object_type' to the TypeName requested to the
+# factory and the proxy class used to narrow the returned proxy.
+_PROXY_TABLE = {
+    "RList": (_TN_RLIST, _PRX_RLIST),
+    "RDict": (_TN_RDICT, _PRX_RDICT),
+    "RSet": (_TN_RSET, _PRX_RSET),
+}
+
+# Object types whose proxies have already been verified with a checkedCast.
+_checked_types: set[str] = set()
+
+
+class _ProxyUnavailable(Exception):
+    """Raised when the factory does not return a usable proxy.
+
+    lru_cache does not store exceptions, so a failed lookup is retried on
+    the next event instead of being remembered as None.
+    """
+
+
+def get_rtype_proxy(factory: Any, obj_type: str, obj_identifier: str) -> Any:
     """
     Retrieves the specific remote proxy (RList, RDict, RSet, etc.) from the 
     provided factory based on the 'obj_type'. If the 'obj_type' is not recognized, 
     this function will return None.
 
+    Proxies are cached per (factory, obj_type, obj_identifier), so the
+    factory is only contacted the first time a remote object is used (see
+    'esperar_evento_con_reintento' for how stale proxies are discarded).
+
     :param factory: The ICE remote factory proxy that can return specific 
                     object proxies (e.g., RList, RDict, RSet).
     :param obj_type: A string that indicates the type of remote object we want 
@@ -174,152 +346,100 @@ def get_rtype_proxy(factory, obj_type, obj_identifier):
     :return: An ICE proxy for the requested remote object, or None if the 
              type is not recognized.
     """
-    if obj_type == "RList":
-        return rt.RemoteTypes.RListPrx.checkedCast(
-            factory.get(rt.RemoteTypes.TypeName.RList, obj_identifier)
-        )
-    elif obj_type == "RDict":
-        return rt.RemoteTypes.RDictPrx.checkedCast(
-            factory.get(rt.RemoteTypes.TypeName.RDict, obj_identifier)
-        )
-    elif obj_type == "RSet":
-        return rt.RemoteTypes.RSetPrx.checkedCast(
-            factory.get(rt.RemoteTypes.TypeName.RSet, obj_identifier)
-        )
-    else:
+    if obj_type not in _PROXY_TABLE:
         # If we do not recognize the object type, return None 
         # so the caller can handle it as an error.
         return None
+    try:
+        return _cached_rtype_proxy(factory, obj_type, obj_identifier)
+    except _ProxyUnavailable:
+        return None
 
 
-def process_common_operation(rtype_prx, operation, args):
-    """
-    Executes the operations that are shared among multiple remote object 
-    types (RList, RDict, RSet). These include:
-      - identifier
-      - remove
-      - length
-      - contains
-      - hash
-      - iter (which is not supported in this example)
-
-    If an operation is not recognized here, this function returns (None, None), 
-    indicating that the operation might be specific to a particular object type 
-    and should be handled elsewhere.
-
-    :param rtype_prx: A proxy object to the remote RList, RDict, or RSet.
-    :param operation: The name of the operation (a string).
-    :param args: A dictionary containing additional arguments needed 
-                 by the operation (e.g., "item", "index", etc.).
-    :return: A tuple (result, error). If the operation produces a result, 
-             'result' will be a non-None value. If the operation fails or 
-             is unsupported, 'error' will contain a non-None string.
-    """
-    if operation == "identifier":
-        return rtype_prx.identifier(), None
-    elif operation == "remove":
-        # 'remove' requires an 'item' argument to remove from the remote object.
-        rtype_prx.remove(args["item"])
-        return None, None
-    elif operation == "length":
-        return rtype_prx.length(), None
-    elif operation == "contains":
-        # 'contains' requires an 'item' argument to check for membership.
-        return rtype_prx.contains(args["item"]), None
-    elif operation == "hash":
-        return rtype_prx.hash(), None
-    elif operation == "iter":
-        # For demonstration, we assume 'iter' is not supported here.
-        return None, "OperationNotSupported"
-
-    # If the operation is not one of the above, return (None, None) 
-    # so the caller can process it as a specialized operation.
-    return None, None
-
-
-def process_rlist(rtype_prx, operation, args):
-    """
-    Handles operations specific to RList objects. 
-    These include 'append', 'pop', and 'getItem'.
-
-    :param rtype_prx: A proxy to an RList remote object.
-    :param operation: Name of the operation to perform.
-    :param args: Arguments needed by the operation, such as "item" or "index".
-    :return: A tuple (result, error) indicating the result of the operation 
-             or any error encountered.
-    """
-    result, error = None, None
-    if operation == "append":
-        rtype_prx.append(**args)
-    elif operation == "pop":
-        # 'pop' may optionally require an 'index'.
-        if "index" in args:
-            rtype_prx.pop(**args)
-        else:
-            rtype_prx.pop()
-    elif operation == "getItem":
-        # 'getItem' needs an 'index' to retrieve the element at that position.
-        result = rtype_prx.getItem(**args)
-    else:
-        # If the operation is not recognized, return an error.
-        error = "OperationNotSupported"
-    return result, error
-
-
-def process_rset(rtype_prx, operation, args):
-    """
-    Handles operations specific to RSet objects.
-    These include 'add' and 'pop'.
-
-    :param rtype_prx: A proxy to an RSet remote object.
-    :param operation: Name of the operation to perform.
-    :param args: Arguments such as 'item' which might be required for 'add'.
-    :return: A tuple (result, error) indicating the result of the operation 
-             or any error encountered.
+@functools.lru_cache(maxsize=4096)
+def _cached_rtype_proxy(factory: Any, obj_type: str, obj_identifier: str) -> Any:
     """
-    result, error = None, None
-    if operation == "add":
-        # 'add' requires an 'item' argument to insert into the set.
-        rtype_prx.add(**args)
-    elif operation == "pop":
-        # 'pop' removes and returns an arbitrary element from the set 
-        # (though the remote method may handle it differently).
-        rtype_prx.pop()
-    else:
-        # If the operation is not recognized, return an error.
-        error = "OperationNotSupported"
-    return result, error
-
-
-def process_rset(rtype_prx, operation, args):
+    Asks the factory for the remote object and narrows the returned proxy.
+    The first proxy of each type is verified with a checkedCast; the rest
+    use an uncheckedCast, which does not need an extra round-trip.
     """
-    Handles operations specific to RSet objects.
-    These include 'add' and 'pop'.
-
-    :param rtype_prx: A proxy to an RSet remote object.
-    :param operation: Name of the operation to perform.
-    :param args: Arguments such as 'item' which might be required for 'add'.
-    :return: A tuple (result, error) indicating the result of the operation 
-             or any error encountered.
-    """
-    result, error = None, None
-    if operation == "add":
-        # 'add' requires an 'item' argument to insert into the set.
-        rtype_prx.add(**args)
-    elif operation == "pop":
-        # 'pop' removes and returns an arbitrary element from the set 
-        # (though the remote method may handle it differently).
-        rtype_prx.pop()
-    return result, error
-
-
-def hacer_evento(factory, event):
+    type_name, prx_class = _PROXY_TABLE[obj_type]
+    proxy = factory.get(type_name, obj_identifier)
+    if obj_type in _checked_types:
+        return prx_class.uncheckedCast(proxy)
+    rtype_prx = prx_class.checkedCast(proxy)
+    if rtype_prx is None:
+        raise _ProxyUnavailable(obj_identifier)
+    _checked_types.add(obj_type)
+    return rtype_prx
+
+
+# Operations shared by every remote object type (RList, RDict, RSet).
+# Each handler receives the proxy and the 'args' dictionary of the event
+# and starts an asynchronous invocation, returning its future (whose
+# result is None if the operation has no result).
+# 'iter' is not supported through Kafka, so it is not listed.
+_COMMON_OPS = {
+    "identifier": lambda prx, args: prx.identifierAsync(),
+    "remove": lambda prx, args: prx.removeAsync(args["item"]),
+    "length": lambda prx, args: prx.lengthAsync(),
+    "contains": lambda prx, args: prx.containsAsync(args["item"]),
+    "hash": lambda prx, args: prx.hashAsync(),
+}
+
+# Operations specific to each remote object type.
+_TYPE_OPS = {
+    "RList": {
+        "append": lambda prx, args: prx.appendAsync(args["item"]),
+        # 'pop' may optionally receive an 'index'; the Python mapping needs
+        # an omitted optional parameter to be passed as Ice.Unset.
+        "pop": lambda prx, args: prx.popAsync(args.get("index", Ice.Unset)),
+        "getItem": lambda prx, args: prx.getItemAsync(args["index"]),
+    },
+    "RDict": {
+        "setItem": lambda prx, args: prx.setItemAsync(args["key"], args["item"]),
+        "getItem": lambda prx, args: prx.getItemAsync(args["key"]),
+        "pop": lambda prx, args: prx.popAsync(args["key"]),
+    },
+    "RSet": {
+        "add": lambda prx, args: prx.addAsync(args["item"]),
+        "pop": lambda prx, args: prx.popAsync(),
+    },
+}
+
+# Shared 'args' of the events that do not include any. Handlers never
+# modify their arguments, so no new dictionary is needed per event.
+_EMPTY_ARGS: dict[str, Any] = {}
+
+# Arguments (and their types) expected by each (object_type, operation) pair.
+_EXPECTED_ARGS: dict[tuple[str, str], dict[str, type]] = {
+    ("RList", "remove"): {"item": str},
+    ("RList", "contains"): {"item": str},
+    ("RDict", "remove"): {"item": str},
+    ("RDict", "contains"): {"item": str},
+    ("RSet", "remove"): {"item": str},
+    ("RSet", "contains"): {"item": str},
+    ("RList", "append"): {"item": str},
+    ("RList", "getItem"): {"index": int},
+    ("RDict", "setItem"): {"key": str, "item": str},
+    ("RDict", "getItem"): {"key": str},
+    ("RDict", "pop"): {"key": str},
+    ("RSet", "add"): {"item": str},
+}
+
+# Arguments (and their types) that an operation accepts but does not require.
+_OPTIONAL_ARGS: dict[tuple[str, str], dict[str, type]] = {
+    ("RList", "pop"): {"index": int},
+}
+
+
+def hacer_evento(factory: Any, event: dict[str, Any]) -> tuple[Any, Optional[str]]:
     """
     Processes a single event (i.e., a single operation request on a 
     remote object). It determines which remote object type is being 
-    targeted (RList, RDict, or RSet), checks whether the operation is 
-    a common one or requires specialized handling, and then executes 
-    the operation accordingly.
+    targeted (RList, RDict, or RSet), looks up the handler of the operation
+    in the common or type-specific dispatch tables, and then starts
+    the operation asynchronously.
 
     :param factory: The ICE remote factory object used to retrieve proxies.
     :param event: A dictionary describing the requested operation, expected 
@@ -328,22 +448,38 @@ def hacer_evento(factory, event):
                       "object_type": "RList", "RDict", or "RSet"
                       "operation": Name of the operation (e.g., "append")
                       "args": A dictionary of arguments (optional)
-    :return: A tuple (result, error) where 'result' can be any object/str 
-             returned by the operation, and 'error' is a string describing 
-             an error if one occurs, or None otherwise.
+    :return: A tuple (future, error) where 'future' is the Ice future of
+             the started invocation (see 'esperar_evento'), or None if the
+             event could not be dispatched, and 'error' is a string
+             describing an error if one occurs, or None otherwise.
     """
 
-    if not all(key in event for key in ["id", "object_type", "object_identifier", "operation"]):
+    if not isinstance(event, dict):
+        return None, "MalformedOperation"
+
+    # Every field is fetched once; a missing (or null) one makes the event malformed.
+    event_get = event.get
+    event_id = event_get("id")
+    obj_type = event_get("object_type")
+    obj_identifier = event_get("object_identifier")
+    operation = event_get("operation")
+    if event_id is None or obj_type is None or obj_identifier is None or operation is None:
         return None, "MalformedOperation"
 
-    obj_type = event["object_type"]
-    obj_identifier = event["object_identifier"]
-    operation = event["operation"]
-    args = event.get("args", {})
+    args = event_get("args", _EMPTY_ARGS)
 
     if args is None or not isinstance(args, dict):
         return None, "InvalidArgs"
 
+    # 1. Find the handler of the operation: first among the common
+    #    operations, then among the ones of the requested object type.
+    type_ops = _TYPE_OPS.get(obj_type)
+    if type_ops is None:
+        return None, "UnknownObjectType"
+    handler = _COMMON_OPS.get(operation) or type_ops.get(operation)
+    if handler is None:
+        return None, "OperationNotSupported"
+
     expected_args = get_expected_args(obj_type, operation)
     
     for arg_name, arg_type in expected_args.items():
@@ -351,40 +487,63 @@ def hacer_evento(factory, event):
             return None, f"Missing argument: {arg_name}"
         if not isinstance(args[arg_name], arg_type):
             return None, f"Invalid argument type for {arg_name}: Expected {arg_type.__name__}"
+    for arg_name, arg_type in _OPTIONAL_ARGS.get((obj_type, operation), _EMPTY_ARGS).items():
+        if arg_name in args and not isinstance(args[arg_name], arg_type):
+            return None, f"Invalid argument type for {arg_name}: Expected {arg_type.__name__}"
 
-    # 1. Obtain the appropriate proxy using the factory based on the object type.
+    # 2. Obtain the appropriate proxy using the factory based on the object type.
     rtype_prx = get_rtype_proxy(factory, obj_type, obj_identifier)
     if rtype_prx is None:
         # If obj_type is unrecognized, return an error.
         return None, "UnknownObjectType"
 
-    # 2. Attempt to process the operation in the "common" group.
-    #    If 'process_common_operation' returns a non-None result or an error,
-    #    we immediately return that to the caller.
-    result, error = process_common_operation(rtype_prx, operation, args)
-    if result is not None or error is not None:
-        return result, error
+    # 3. Start the operation without waiting for its reply.
+    try:
+        return handler(rtype_prx, args), None
+    except Exception as e:
+        return None, type(e).__name__
 
-    # 3. If not handled as a common operation, dispatch to specialized logic 
-    #    based on the object type (RList, RDict, or RSet).
+
+def esperar_evento(future: Any) -> tuple[Any, Optional[str]]:
+    """
+    Waits for the reply of an operation started by 'hacer_evento'.
+
+    :param future: The Ice future returned by 'hacer_evento'.
+    :return: A tuple (result, error) where 'result' can be any object/str
+             returned by the operation, and 'error' is the name of the class
+             of the exception raised by the operation (KeyError,
+             IndexError...), or None otherwise.
+    """
     try:
-        if obj_type == "RList":
-            result, error = process_rlist(rtype_prx, operation, args)
-        elif obj_type == "RDict":
-            result, error = process_rdict(rtype_prx, operation, args)
-        elif obj_type == "RSet":
-            result, error = process_rset(rtype_prx, operation, args)
-        else:
-            # This else clause should not occur if 'get_rtype_proxy' 
-            # handles all recognized types, but is here for safety.
-            error = "UnknownObjectType"
+        return future.result(), None
     except Exception as e:
-        return None, e._class.name_
+        return None, type(e).__name__
 
-    return result, error
 
+def esperar_evento_con_reintento(factory: Any, event: dict[str, Any], future: Any) -> tuple[Any, Optional[str]]:
+    """
+    Waits for the reply of an operation started by 'hacer_evento', like
+    'esperar_evento'. Proxies are cached for the life of the client, so if
+    the remote object no longer exists (e.g. the server was restarted and
+    registered its objects under new identities), the cached proxies are
+    discarded and the event is sent once more with a fresh one.
 
-def get_expected_args(obj_type, operation):
+    :param factory: The ICE remote factory object used to retrieve proxies.
+    :param event: The event that started the operation.
+    :param future: The Ice future returned by 'hacer_evento' for 'event'.
+    :return: A tuple (result, error), as returned by 'esperar_evento'.
+    """
+    result, error = esperar_evento(future)
+    if error != "ObjectNotExistException":
+        return result, error
+    _cached_rtype_proxy.cache_clear()
+    future, error = hacer_evento(factory, event)
+    if future is None:
+        return None, error
+    return esperar_evento(future)
+
+
+def get_expected_args(obj_type: str, operation: str) -> dict[str, type]:
     """
     Returns a dictionary of expected arguments and their types for a given object type and operation.
 
@@ -392,72 +551,9 @@ def get_expected_args(obj_type, operation):
     :param operation: The operation being performed (e.g., "append", "getItem").
     :return: A dictionary where keys are argument names and values are their expected types.
     """
-    if obj_type == "RList":
-        if operation == "append":
-            return {"item": str}
-        elif operation == "pop":
-            return {"index": int}
-        elif operation == "getItem":
-            return {"index": int}
-    elif obj_type == "RDict":
-        if operation == "setItem":
-            return {"key": str, "item": str}
-        elif operation == "getItem":
-            return {"key": str}
-        elif operation == "pop":
-            return {"key": str}
-    elif obj_type == "RSet":
-        if operation == "add":
-            return {"item": str}
-        elif operation == "pop":
-            return {}
-    return {}
-
-def process_common_operation(rtype_prx, operation, args):
-    """
-    Executes the operations that are shared among multiple remote object 
-    types (RList, RDict, RSet). These include:
-      - identifier
-      - remove
-      - length
-      - contains
-      - hash
-      - iter (which is not supported in this example)
-
-    If an operation is not recognized here, this function returns (None, None), 
-    indicating that the operation might be specific to a particular object type 
-    and should be handled elsewhere.
-
-    :param rtype_prx: A proxy object to the remote RList, RDict, or RSet.
-    :param operation: The name of the operation (a string).
-    :param args: A dictionary containing additional arguments needed 
-                 by the operation (e.g., "item", "index", etc.).
-    :return: A tuple (result, error). If the operation produces a result, 
-             'result' will be a non-None value. If the operation fails or 
-             is unsupported, 'error' will contain a non-None string.
-    """
-    if operation == "identifier":
-        return rtype_prx.identifier(), None
-    elif operation == "remove":
-        # 'remove' requires an 'item' argument to remove from the remote object.
-        rtype_prx.remove(**args)
-        return None, None
-    elif operation == "length":
-        return rtype_prx.length(), None
-    elif operation == "contains":
-        # 'contains' requires an 'item' argument to check for membership.
-        return rtype_prx.contains(**args), None
-    elif operation == "hash":
-        return rtype_prx.hash(), None
-    elif operation == "iter":
-        # For demonstration, we assume 'iter' is not supported here.
-        return None, "OperationNotSupported"
-
-    # If the operation is not one of the above, return (None, None) 
-    # so the caller can process it as a specialized operation.
-    return None, None
+    return _EXPECTED_ARGS.get((obj_type, operation), {})
 
-def main():
+def main() -> None:
     """
     The main entry point for this script. Instantiates the Kafka_client class
     and invokes the 'main' method from Ice.Application. This ensures that 
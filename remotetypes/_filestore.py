@@ -0,0 +1,319 @@
+"""Almacén compartido de los archivos JSON de los tipos remotos.
+
+Varios objetos remotos pueden guardar sus datos en el mismo archivo (por
+ejemplo, todas las listas que usan `remotelist_data.json`). En lugar de leer,
+modificar y reescribir el archivo completo en cada guardado, el contenido de
+cada archivo se carga una única vez y se mantiene en memoria: los objetos
+actualizan su clave en la caché y el archivo se escribe desde ella.
+
+Las escrituras no se hacen en el hilo que las solicita (el hilo de Ice que
+atiende la petición o el temporizador de guardado), sino en un único hilo
+escritor en segundo plano que las recibe, en orden, a través de una cola.
+"""
+
+import atexit
+import functools
+import logging
+import os
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+from remotetypes import serialization
+
+WRITE_BUFFER_SIZE = 1 << 20  # Buffer de escritura de 1 MiB: cada archivo se escribe de una vez
+EMPTY_FILE_SIZE = 2  # Los archivos de este tamaño o menos ("", "{}", "[]") no tienen datos
+
+# Con REMOTETYPES_PRETTY_JSON=1 los archivos se escriben indentados, para poder leerlos al depurar
+PRETTY_JSON = os.environ.get("REMOTETYPES_PRETTY_JSON", "").lower() not in ("", "0", "false", "no")
+
+
+def _stamp(path: str) -> Optional[tuple[int, int]]:
+    """Devuelve la fecha de modificación y el tamaño del archivo, o None si no existe."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _write_tmp(path: str, payload: bytes) -> str:
+    """Escribe los datos en `path + ".tmp"`, los sincroniza con el disco y devuelve esa ruta."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb", buffering=WRITE_BUFFER_SIZE) as file:
+        file.write(payload)
+        file.flush()
+        os.fsync(file.fileno())
+    return tmp_path
+
+
+def _fsync_dir(directory: str) -> None:
+    """Sincroniza con el disco un directorio, para que los renombrados en él sean duraderos."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Sistemas que no permiten abrir directorios
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, payload: bytes) -> None:
+    """Reescribe el archivo de forma atómica y duradera.
+
+    Los datos se escriben en `path + ".tmp"`, se sincronizan con el disco y
+    después el temporal sustituye al archivo original, de forma que una caída a
+    mitad de la escritura nunca deja el archivo a medias.
+    """
+    os.replace(_write_tmp(path, payload), path)
+    _fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+def _encode_pair(key: str, value: Any) -> bytes:
+    """Codifica un par `"clave":valor` de un objeto JSON."""
+    return serialization.dumps(key) + b":" + serialization.dumps(value)
+
+
+# Cola de escrituras pendientes. Cada tarea es una tupla (acción, ruta, datos, al_terminar):
+#   ("append", ruta, bytes): añade los bytes al final del archivo.
+#   ("replace", ruta, bytes): reescribe atómicamente el archivo completo.
+#   ("remove", ruta, None): borra el archivo si existe.
+#   ("sync", None, threading.Event): marca el evento cuando todo lo anterior se ha escrito.
+# `al_terminar` es una función opcional a la que se llama cuando la tarea ha terminado.
+_WRITE_QUEUE: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+_writer_thread: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+GROUP_COMMIT_SIZE = 32  # Máximo de reescrituras que se publican juntas
+
+
+def _start_writer() -> None:
+    """Arranca el hilo escritor si todavía no está en marcha."""
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(
+                target=_drain_write_queue, name="FileStoreWriter", daemon=True
+            )
+            _writer_thread.start()
+
+
+def _drain_write_queue() -> None:
+    """Bucle del hilo escritor: ejecuta las tareas de la cola en orden."""
+    while True:
+        tasks = [_WRITE_QUEUE.get()]
+        # Recoge también el resto de tareas ya encoladas para poder fusionarlas
+        while True:
+            try:
+                tasks.append(_WRITE_QUEUE.get_nowait())
+            except queue.Empty:
+                break
+
+        # Las reescrituras consecutivas se publican juntas (ver `_commit_group`)
+        group: list[tuple] = []
+        for task in tasks:
+            action, path, payload, on_done = task
+            if action == "replace":
+                group.append(task)
+                if len(group) >= GROUP_COMMIT_SIZE:
+                    _commit_group(group)
+                    group = []
+                continue
+            if group:
+                _commit_group(group)
+                group = []
+
+            if action == "sync":
+                payload.set()
+                continue
+            try:
+                _write(action, path, payload)
+            except OSError:
+                logging.getLogger(__name__).exception("Error al escribir %s", path)
+            finally:
+                if on_done is not None:
+                    on_done()
+        if group:
+            _commit_group(group)
+
+
+def _commit_group(group: list[tuple]) -> None:
+    """Publica juntas varias reescrituras atómicas.
+
+    De cada archivo solo se escribe su última versión. Primero se escriben y
+    sincronizan todos los temporales, después se renombran y, por último, se
+    sincroniza una sola vez cada directorio afectado, en lugar de una vez por
+    archivo.
+    """
+    latest = {path: payload for _, path, payload, _ in group}
+    written = []
+    for path, payload in latest.items():
+        try:
+            written.append((_write_tmp(path, payload), path))
+        except OSError:
+            logging.getLogger(__name__).exception("Error al escribir %s", path)
+    replaced = []
+    for tmp_path, path in written:
+        try:
+            os.replace(tmp_path, path)
+            replaced.append(path)
+        except OSError:
+            logging.getLogger(__name__).exception("Error al escribir %s", path)
+    for directory in {os.path.dirname(os.path.abspath(path)) for path in replaced}:
+        _fsync_dir(directory)
+    for _, _, _, on_done in group:
+        if on_done is not None:
+            on_done()
+
+
+def _write(action: str, path: str, payload: Optional[bytes]) -> None:
+    """Ejecuta una tarea de escritura en el hilo escritor."""
+    if action == "remove":
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    elif payload is None:
+        return  # `submit_write` no encola escrituras sin datos
+    elif action == "append":
+        with open(path, "ab") as file:
+            file.write(payload)
+    elif action == "replace":
+        atomic_write(path, payload)
+
+
+def submit_write(
+    action: str,
+    path: str,
+    payload: Optional[bytes] = None,
+    on_done: Optional[Callable[[], None]] = None,
+) -> None:
+    """Encola una escritura para el hilo escritor y vuelve inmediatamente."""
+    if payload is None and action in ("append", "replace"):
+        raise ValueError(f"La escritura '{action}' de {path} necesita datos")
+    _start_writer()
+    _WRITE_QUEUE.put((action, path, payload, on_done))
+
+
+def flush_writes() -> None:
+    """Espera a que el hilo escritor haya escrito todas las tareas encoladas."""
+    if _writer_thread is None:
+        return
+    done = threading.Event()
+    _WRITE_QUEUE.put(("sync", None, done, None))
+    done.wait()
+
+
+# Las escrituras pendientes no se pierden al terminar el proceso
+atexit.register(flush_writes)
+
+
+class FileStore:
+    """Caché en memoria del contenido de los archivos de almacenamiento, indexada por ruta.
+
+    Además del contenido, se guarda cada par `"clave":valor` ya codificado como
+    JSON, de forma que al escribir un archivo solo se codifican las claves que
+    han cambiado desde la última escritura.
+    """
+
+    def __init__(self) -> None:
+        """Inicializa un almacén vacío."""
+        self._cache: dict[str, dict] = {}
+        self._encoded: dict[str, dict[str, bytes]] = {}  # Pares ya codificados de cada archivo
+        self._stamps: dict[str, Optional[tuple[int, int]]] = {}
+        self._pending: dict[str, int] = {}  # Escrituras encoladas y aún no terminadas
+        self._locks: dict[str, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, path: str) -> threading.RLock:
+        """Devuelve el cerrojo asociado a un archivo."""
+        with self._locks_guard:
+            lock = self._locks.get(path)
+            if lock is None:
+                lock = self._locks[path] = threading.RLock()
+            return lock
+
+    def load(self, path: str) -> dict:
+        """Devuelve el contenido del archivo, leyéndolo solo si ha cambiado en disco.
+
+        Mientras haya escrituras pendientes del archivo, la caché es más reciente
+        que el disco y se devuelve sin comprobarlo. Si el archivo no existe, está
+        vacío o no es válido, se devuelve un diccionario vacío.
+        """
+        with self._lock(path):
+            if self._pending.get(path):
+                return self._cache[path]
+            stamp = _stamp(path)
+            if path in self._cache and self._stamps.get(path) == stamp:
+                return self._cache[path]
+
+            data: Any = {}
+            # Los archivos vacíos o con "{}" se dan por vacíos sin abrirlos ni analizarlos
+            if stamp is not None and stamp[1] > EMPTY_FILE_SIZE:
+                try:
+                    with open(path, "rb") as file:
+                        data = serialization.loads(file.read())
+                except serialization.JSONDecodeError:
+                    data = {}
+            if not isinstance(data, dict):
+                data = {}
+
+            self._cache[path] = data
+            self._encoded[path] = {}
+            self._stamps[path] = stamp
+            return data
+
+    def set_key(self, path: str, key: str, value: Any) -> None:
+        """Actualiza en la caché el valor de una clave del archivo.
+
+        El valor no debe modificarse después: se guarda ya codificado.
+        """
+        with self._lock(path):
+            self.load(path)[key] = value
+            self._encoded[path][key] = _encode_pair(key, value)
+
+    def set_all(self, path: str, data: dict) -> None:
+        """Sustituye en la caché todo el contenido del archivo."""
+        with self._lock(path):
+            self._cache[path] = data
+            self._encoded[path] = {}
+            self._stamps.setdefault(path, _stamp(path))
+
+    def flush(self, path: str) -> None:
+        """Encola la escritura del contenido en caché del archivo como JSON compacto.
+
+        Si está activado `PRETTY_JSON`, el archivo se escribe indentado.
+
+        Los datos se serializan en el hilo que llama, para que el archivo refleje
+        su estado actual, y se escriben en el hilo escritor.
+        """
+        with self._lock(path):
+            data = self._cache.get(path)
+            if data is None:
+                return
+            if PRETTY_JSON:
+                payload = serialization.dumps(data, indent=True)
+            else:
+                encoded = self._encoded[path]
+                parts = []
+                for key, value in data.items():
+                    part = encoded.get(key)
+                    if part is None:
+                        part = encoded[key] = _encode_pair(key, value)
+                    parts.append(part)
+                payload = b"{" + b",".join(parts) + b"}"
+            self._pending[path] = self._pending.get(path, 0) + 1
+            submit_write("replace", path, payload, functools.partial(self._write_done, path))
+
+    def _write_done(self, path: str) -> None:
+        """Registra en el hilo escritor que ha terminado una escritura del archivo."""
+        with self._lock(path):
+            self._pending[path] -= 1
+            if not self._pending[path]:
+                self._stamps[path] = _stamp(path)
+
+
+FILE_STORE = FileStore()
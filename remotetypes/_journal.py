@@ -0,0 +1,204 @@
+"""Diario de operaciones para los archivos de almacenamiento de los tipos remotos.
+
+En lugar de reescribir el archivo completo en cada modificación, los objetos
+añaden al final de `ruta + ".log"` una línea JSON `[identificador, operación]`
+por cada operación, lo que escribe O(1) bytes por modificación. Al cargar, la
+instantánea (`ruta`) se reconstruye reproduciendo el diario. Cuando el diario
+crece más del doble que la instantánea, se compacta: se reescribe la
+instantánea con el estado actual y se borra el diario.
+
+Todos los objetos que guardan sus datos en la misma ruta comparten un único
+`Journal`, que se obtiene con `open_journal()`. Igual que `FileStore`, el
+diario mantiene en memoria el estado guardado de cada objeto y, al cargar, lo
+vuelve a leer del disco si la instantánea o el diario han cambiado fuera del
+proceso.
+"""
+
+import threading
+from typing import Any, Callable, Iterable, Optional
+
+from remotetypes import serialization
+from remotetypes._filestore import EMPTY_FILE_SIZE, PRETTY_JSON, _stamp, flush_writes, submit_write
+
+
+class Journal:
+    """Instantánea JSON más diario de operaciones de un archivo de almacenamiento."""
+
+    COMPACTION_FACTOR = 2  # El diario se compacta al superar este múltiplo de la instantánea
+    MIN_COMPACTION_BYTES = 64 * 1024  # Tamaño mínimo del diario para compactarlo
+
+    def __init__(
+        self,
+        path: str,
+        apply: Callable[[Any, Any], Any],
+        encode: Callable[[Any], Any] = lambda value: value,
+        legacy: Optional[Callable[[dict], bool]] = None,
+    ) -> None:
+        """Abre el diario de `path` y reconstruye su estado.
+
+        Args:
+            path (str): Ruta de la instantánea. El diario se guarda en `path + ".log"`.
+            apply (Callable): Aplica una operación del diario sobre los datos de
+                un objeto (o None si no tenía) y devuelve el resultado. Debe
+                tolerar operaciones repetidas.
+            encode (Callable): Convierte los datos devueltos por `apply` en un
+                valor serializable como JSON.
+            legacy (Optional[Callable]): Indica si una instantánea tiene el formato
+                antiguo, con los datos de un único objeto en lugar de un objeto
+                JSON por identificador. Esos datos pasan al primer objeto que se
+                cargue y la instantánea se reescribe con el formato actual.
+
+        """
+        self.path = path
+        self.log_path = path + ".log"
+        self._apply = apply
+        self._encode = encode
+        self._is_legacy = legacy
+        self._legacy: Any = None  # Datos de una instantánea antigua aún sin propietario
+        self._lock = threading.RLock()
+        self._stamps: tuple[Optional[tuple[int, int]], Optional[tuple[int, int]]] = (None, None)
+        self._pending = 0  # Escrituras encoladas y aún no terminadas
+        self._log_bytes = 0
+        self._snapshot_bytes = 0
+        self._base = self._replay()
+
+    def _disk_stamps(self) -> tuple[Optional[tuple[int, int]], Optional[tuple[int, int]]]:
+        """Devuelve la fecha de modificación y el tamaño de la instantánea y del diario."""
+        return _stamp(self.path), _stamp(self.log_path)
+
+    def _replay(self) -> dict:
+        """Carga la instantánea y reproduce sobre ella el diario de operaciones."""
+        # Las escrituras pendientes de estos archivos deben llegar antes al disco
+        flush_writes()
+        # Se toman antes de leer, para detectar después cualquier cambio posterior
+        self._stamps = self._disk_stamps()
+        self._log_bytes = 0
+        self._snapshot_bytes = 0
+        data: Any = {}
+        snapshot_stamp = self._stamps[0]
+        # Las instantáneas vacías o con "{}" se dan por vacías sin abrirlas ni analizarlas
+        if snapshot_stamp is not None and snapshot_stamp[1] > EMPTY_FILE_SIZE:
+            with open(self.path, "rb") as file:
+                payload = file.read()
+            self._snapshot_bytes = len(payload)
+            try:
+                data = serialization.loads(payload)
+            except serialization.JSONDecodeError:
+                data = {}
+            if not isinstance(data, dict):
+                data = {}
+
+        self._legacy = None
+        if data and self._is_legacy is not None and self._is_legacy(data):
+            self._legacy, data = data, {}
+
+        if self._stamps[1] is not None:
+            with open(self.log_path, "rb") as file:
+                for line in file:
+                    try:
+                        identifier, op_record = serialization.loads(line)
+                    except serialization.JSONDecodeError:
+                        # Línea incompleta por una escritura interrumpida: es la última
+                        break
+                    value = data.get(identifier)
+                    if value is None and self._legacy is not None:
+                        value, self._legacy = self._legacy, None
+                    data[identifier] = self._apply(value, op_record)
+                    self._log_bytes += len(line)
+        return data
+
+    def load(self, identifier: str) -> Any:
+        """Devuelve, serializables como JSON, los datos guardados de un objeto.
+
+        Mientras haya escrituras pendientes, el estado en memoria es más reciente
+        que el disco y se devuelve sin comprobarlo. Si no, la instantánea y el
+        diario se vuelven a leer cuando han cambiado o desaparecido del disco.
+        """
+        with self._lock:
+            self._refresh()
+            if self._legacy is not None and identifier not in self._base:
+                self._base[identifier], self._legacy = self._legacy, None
+                # La instantánea se reescribe ya con el formato actual
+                self.compact()
+            return self._encode(self._base.get(identifier))
+
+    def contains(self, identifier: str) -> bool:
+        """Indica si hay datos guardados de un objeto."""
+        with self._lock:
+            self._refresh()
+            return identifier in self._base
+
+    def _refresh(self) -> None:
+        """Vuelve a leer la instantánea y el diario si han cambiado en disco desde la última lectura."""
+        if not self._pending and self._disk_stamps() != self._stamps:
+            self._base = self._replay()
+
+    def record(self, identifier: str, op_records: Iterable[Any]) -> None:
+        """Añade al diario, en una sola escritura, varias operaciones de un objeto."""
+        op_records = list(op_records)
+        payload = b"".join(
+            serialization.dumps([identifier, op_record]) + b"\n" for op_record in op_records
+        )
+        if not payload:
+            return
+        with self._lock:
+            value = self._base.get(identifier)
+            for op_record in op_records:
+                value = self._apply(value, op_record)
+            self._base[identifier] = value
+            self._submit("append", self.log_path, payload)
+            self._log_bytes += len(payload)
+            limit = self.COMPACTION_FACTOR * max(self._snapshot_bytes, self.MIN_COMPACTION_BYTES)
+            if self._log_bytes > limit:
+                self.compact()
+
+    def compact(self) -> None:
+        """Reescribe la instantánea con el estado actual y borra el diario."""
+        with self._lock:
+            payload = serialization.dumps(
+                {identifier: self._encode(value) for identifier, value in self._base.items()},
+                indent=PRETTY_JSON,
+            )
+            self._submit("replace", self.path, payload)
+            self._submit("remove", self.log_path)
+            self._snapshot_bytes = len(payload)
+            self._log_bytes = 0
+
+    def _submit(self, action: str, path: str, payload: Optional[bytes] = None) -> None:
+        """Encola una escritura de la instantánea o del diario y la cuenta como pendiente."""
+        self._pending += 1
+        submit_write(action, path, payload, self._write_done)
+
+    def _write_done(self) -> None:
+        """Registra en el hilo escritor que ha terminado una escritura de estos archivos."""
+        with self._lock:
+            self._pending -= 1
+            if not self._pending:
+                self._stamps = self._disk_stamps()
+
+
+_JOURNALS: dict[str, Journal] = {}
+_journals_lock = threading.Lock()
+
+
+def open_journal(
+    path: str,
+    apply: Callable[[Any, Any], Any],
+    encode: Callable[[Any], Any] = lambda value: value,
+    legacy: Optional[Callable[[dict], bool]] = None,
+) -> Journal:
+    """Devuelve el diario compartido de `path`, abriéndolo si es la primera vez."""
+    with _journals_lock:
+        journal = _JOURNALS.get(path)
+        if journal is None:
+            journal = _JOURNALS[path] = Journal(path, apply, encode, legacy)
+        return journal
+
+
+def close_journal(path: str) -> None:
+    """Olvida el diario compartido de `path`; el siguiente `open_journal` lo vuelve a leer del disco.
+
+    Las escrituras ya encoladas del diario siguen su curso en el hilo escritor.
+    """
+    with _journals_lock:
+        _JOURNALS.pop(path, None)
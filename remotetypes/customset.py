@@ -1,4 +1,9 @@
-from typing import Optional
+from typing import Callable, Final, Optional, cast
+
+
+def _identity(item: str) -> str:
+    """Return the item unchanged."""
+    return item
 
 
 class StringSet(set):
@@ -16,18 +21,19 @@ class StringSet(set):
         StringSet(iterable) -> new StringSet object
         """
         self.upper_case = force_upper_case
+        # Transformación aplicada a cada elemento antes de guardarlo o buscarlo
+        self._transform: Final[Callable[[str], str]] = (
+            str.upper if force_upper_case else _identity
+        )
 
-        # Nuevo código para verificar tipos en la inicialización
+        # Verificamos los tipos en una sola pasada y construimos el conjunto
+        # directamente a partir de los elementos (en mayúsculas si procede)
         if args:
-            iterable = args[0]
-            new_iterable = []
-            for item in iterable:
-                if not isinstance(item, str):
-                    raise ValueError(f"El elemento '{item}' no es una cadena")
-                if self.upper_case:
-                    item = item.upper()
-                new_iterable.append(item)
-            super().__init__(new_iterable, **kwargs)
+            items = tuple(args[0])
+            if not all(isinstance(item, str) for item in items):
+                item = next(item for item in items if not isinstance(item, str))
+                raise ValueError(f"El elemento '{item}' no es una cadena")
+            super().__init__(map(self._transform, cast(tuple[str, ...], items)), **kwargs)
         else:
             super().__init__(**kwargs)
 
@@ -36,20 +42,14 @@ class StringSet(set):
         if not isinstance(item, str):
             raise ValueError(f"El elemento '{item}' no es una cadena")
 
-        if self.upper_case:
-            item = item.upper()
-
-        return super().add(item)
+        return super().add(self._transform(item))
 
     def __contains__(self, o: object) -> bool:
         """Overwrite the `in` operator.
 
         x.__contains__(y) <==> y in x.
+        Only str objects are stored, so non-str objects are not converted:
+        they are never contained, and raise TypeError when the set forces
+        upper case.
         """
-        if not isinstance(o, str):
-            o = str(o)
-
-        if self.upper_case:
-            o = o.upper()
-
-        return super().__contains__(o)
+        return super().__contains__(self._transform(o))  # type: ignore[arg-type]
@@ -11,11 +11,20 @@ from remotetypes.remoteset import RemoteSet
 class Factory(rt.Factory):
     STORAGE_PATH = "storage"  # Ruta base para almacenar archivos de persistencia
 
+    # Para cada tipo: clase del servant, plantilla del archivo de persistencia,
+    # clase del proxy e identificador usado si no se especifica ninguno.
+    _TYPES = {
+        rt.TypeName.RDict: (RemoteDict, "rdict_{}.json", rt.RDictPrx, "default_rdict"),
+        rt.TypeName.RList: (RemoteList, "rlist_{}.json", rt.RListPrx, "default_rlist"),
+        rt.TypeName.RSet: (RemoteSet, "rset_{}.json", rt.RSetPrx, "default_rset"),
+    }
+
     def __init__(self) -> None:
         """Inicializa la factoría con los adaptadores necesarios."""
-        self._rdicts: Dict[str, rt.RDictPrx] = {}
-        self._rlists: Dict[str, rt.RListPrx] = {}
-        self._rsets: Dict[str, rt.RSetPrx] = {}
+        # Proxies ya creados, por tipo e identificador
+        self._proxies: Dict[rt.TypeName, Dict[str, rt.RTypePrx]] = {
+            type_name: {} for type_name in self._TYPES
+        }
 
         # Crear el directorio de almacenamiento si no existe
         os.makedirs(self.STORAGE_PATH, exist_ok=True)
@@ -30,40 +39,22 @@ class Factory(rt.Factory):
             current (Optional[Ice.Current]): Contexto de la llamada Ice (se maneja automáticamente).
 
         Returns:
-            rt.RTypePrx: Proxy del objeto remoto solicitado.
+            rt.RTypePrx: Proxy del objeto remoto solicitado, nuevo o existente.
 
         """
-        if typeName == rt.TypeName.RDict:
-            return self._get_rdict(identifier or "default_rdict",current.adapter)
-        elif typeName == rt.TypeName.RList:
-            return self._get_rlist(identifier or "default_rlist",current.adapter)
-        elif typeName == rt.TypeName.RSet:
-            return self._get_rset(identifier or "default_rset",current.adapter)
-        else:
-            raise ValueError(f"Tipo inválido solicitado: {typeName}")
-
-    def _get_rdict(self, identifier: str, adapter) -> rt.RDictPrx:
-        """Devuelve un RDict nuevo o existente."""
-        if identifier not in self._rdicts:
-            storage_file = os.path.join(self.STORAGE_PATH, f"rdict_{identifier}.json")
-            rdict = RemoteDict(identifier, storage_file)  # Usa la clase RemoteDict
-            proxy = adapter.addWithUUID(rdict)
-            self._rdicts[identifier] = rt.RDictPrx.uncheckedCast(proxy)
-        return self._rdicts[identifier]
-
-    def _get_rlist(self, identifier: str,adapter) -> rt.RListPrx:
-        """Devuelve un RList nuevo o existente."""
-        if identifier not in self._rlists:
-            storage_file = os.path.join(self.STORAGE_PATH, f"rlist_{identifier}.json")
-            rlist = RemoteList(identifier, storage_file)  # Usa la clase RemoteList
-            proxy = adapter.addWithUUID(rlist)
-            self._rlists[identifier] = rt.RListPrx.uncheckedCast(proxy)
-        return self._rlists[identifier]
-
-    def _get_rset(self, identifier: str, adapter) -> rt.RSetPrx:
-        """Devuelve un RSet nuevo o existente."""
-        if identifier not in self._rsets:
-            rset = RemoteSet(identifier)
-            proxy = adapter.addWithUUID(rset)  # Registrar como objeto Ice
-            self._rsets[identifier] = rt.RSetPrx.uncheckedCast(proxy)
-        return self._rsets[identifier]
+        try:
+            servant_class, file_template, proxy_class, default_identifier = self._TYPES[typeName]
+        except (KeyError, TypeError):
+            raise ValueError(f"Tipo inválido solicitado: {typeName}") from None
+
+        if current is None:
+            raise RuntimeError("El objeto 'current' es necesario.")
+
+        identifier = identifier or default_identifier
+        proxies = self._proxies[typeName]
+        if identifier not in proxies:
+            storage_file = os.path.join(self.STORAGE_PATH, file_template.format(identifier))
+            servant = servant_class(identifier, storage_file)
+            proxy = current.adapter.addWithUUID(servant)
+            proxies[identifier] = proxy_class.uncheckedCast(proxy)
+        return proxies[identifier]
@@ -1,24 +1,127 @@
+import itertools
+import uuid
 import Ice
 import RemoteTypes as rt
-from RemoteTypes import StopIteration
-from typing import Optional, Any
+from typing import TYPE_CHECKING, Optional, Any
+
+if TYPE_CHECKING:
+    from remotetypes.remotedict import RemoteDict
+    from remotetypes.remotelist import RemoteList
+    from remotetypes.remoteset import RemoteSet
+
+# Excepciones de Slice enlazadas una sola vez, fuera de los caminos frecuentes
+_StopIteration = rt.StopIteration
+_CancelIteration = rt.CancelIteration
+
+_SEP = ": "  # Separador entre clave y valor en los elementos de DictIterator
+
+# Las identidades de los iteradores comparten un prefijo aleatorio por proceso
+# seguido de un contador, en lugar de generar un UUID en cada llamada a iter().
+_ID_PREFIX = uuid.uuid4().hex
+_id_counter = itertools.count()
+
+# Categoría de las identidades de los iteradores. Las identidades de los
+# iteradores ya retirados las atiende el sirviente por defecto de esta categoría.
+ITERATOR_CATEGORY = "iterator"
+
+
+def new_identity() -> Ice.Identity:
+    """Devuelve una identidad única para registrar un iterador en el adaptador."""
+    return Ice.Identity(name=f"{_ID_PREFIX}-{next(_id_counter)}", category=ITERATOR_CATEGORY)
+
+
+class ExhaustedIterable(rt.Iterable):
+    """Sirviente por defecto de los iteradores agotados y ya retirados del adaptador.
+
+    El cliente que siga llamando a un iterador agotado recibe StopIteration,
+    igual que si el iterador siguiera registrado.
+    """
+
+    def next(self, current: Optional[Ice.Current] = None) -> str:
+        """Indica que no quedan elementos."""
+        raise _StopIteration()
+
+    def nextBatch(self, count: int, current: Optional[Ice.Current] = None) -> list[str]:
+        """Indica que no quedan elementos."""
+        raise _StopIteration()
+
+
+_EXHAUSTED = ExhaustedIterable()
+
 
 class Iterable(rt.Iterable):
-    """Clase base para iteradores."""
+    """Clase base para iteradores.
 
-    def __init__(self, data_source: Any, get_mod_count: callable, expected_mod_count: int) -> None:
+    Los iteradores agotados se retiran del adaptador, que deja sus identidades
+    al sirviente por defecto `ExhaustedIterable`, y se guardan en una reserva
+    por clase (`_pool`), de donde `acquire()` los reutiliza en lugar de crear
+    uno nuevo en cada llamada a iter().
+    """
+
+    __slots__ = ("_owner", "_expected_mod_count", "_iterator", "_next")
+
+    POOL_SIZE = 64  # Número máximo de iteradores agotados que se conservan por clase
+    _pool: list = []
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Da a cada clase de iterador su propia reserva."""
+        super().__init_subclass__(**kwargs)
+        cls._pool = []
+
+    def __init__(self, owner: Any) -> None:
         """Inicializa el iterador base.
 
         Args:
-            data_source (Any): La fuente de datos a iterar.
-            get_mod_count (callable): Función para obtener el contador de modificaciones actual.
-            expected_mod_count (int): Contador de modificaciones esperado al momento de la creación.
+            owner (Any): Objeto remoto iterado. Su atributo `_modification_count`
+                se compara con el valor que tenía al crear el iterador.
 
         """
-        self._data_source = data_source
-        self._get_mod_count = get_mod_count
-        self._expected_mod_count = expected_mod_count
-        self._iterator = iter(data_source)
+        self.reset(owner)
+
+    @classmethod
+    def acquire(cls, owner: Any) -> "Iterable":
+        """Devuelve un iterador sobre `owner`, reutilizando uno de la reserva si lo hay."""
+        try:
+            iterator = cls._pool.pop()
+        except IndexError:
+            return cls(owner)
+        iterator.reset(owner)
+        return iterator
+
+    def reset(self, owner: Any) -> None:
+        """Reinicia el iterador para recorrer `owner` desde el principio."""
+        self._owner = owner
+        self._expected_mod_count = owner._modification_count
+        self._iterator = iter(self._data_source(owner))
+        self._next = self._iterator.__next__
+
+    @staticmethod
+    def _data_source(owner: Any) -> Any:
+        """Devuelve la fuente de datos a iterar del objeto remoto."""
+        raise NotImplementedError("Este método debe ser implementado por la subclase.")
+
+    def _release(self, current: Optional[Ice.Current]) -> None:
+        """Libera los datos del iterador agotado, lo retira del adaptador y lo devuelve a la reserva."""
+        if self._owner is None:
+            return
+        # Sin referencias al objeto iterado ni a sus datos una vez agotado
+        self._owner = None
+        self._iterator = None
+        self._next = None
+        if current is None or current.adapter is None or current.id.category != ITERATOR_CATEGORY:
+            return
+        adapter = current.adapter
+        if adapter.findDefaultServant(ITERATOR_CATEGORY) is None:
+            try:
+                adapter.addDefaultServant(_EXHAUSTED, ITERATOR_CATEGORY)
+            except Ice.AlreadyRegisteredException:
+                pass  # Otro hilo lo ha registrado a la vez
+        try:
+            adapter.remove(current.id)
+        except Ice.NotRegisteredException:
+            return  # No se atendía a través del adaptador
+        if len(self._pool) < self.POOL_SIZE:
+            self._pool.append(self)
 
     def next(self, current: Optional[Ice.Current] = None) -> str:
         """Devuelve el siguiente elemento en la iteración.
@@ -28,65 +131,68 @@ class Iterable(rt.Iterable):
             StopIteration: Si se han iterado todos los elementos.
 
         """
-        if self._expected_mod_count != self._get_mod_count():
-            raise rt.CancelIteration("El objeto ha sido modificado durante la iteración.")
+        owner = self._owner
+        if owner is None:
+            raise _StopIteration()  # Ya se había agotado
+        if self._expected_mod_count != owner._modification_count:
+            raise _CancelIteration()
 
         try:
-            return next(self._iterator)
+            return self._next()
         except StopIteration:
-            raise rt.StopIteration("No hay más elementos.")
+            self._release(current)
+            raise _StopIteration()
 
-class ListIterator(BaseIterator):
-    """Iterador para RemoteList."""
+    def nextBatch(self, count: int, current: Optional[Ice.Current] = None) -> list[str]:
+        """Devuelve hasta `count` elementos de la iteración en una sola llamada.
 
-    def __init__(self, remote_list: 'RemoteList') -> None:
-        super().__init__(
-            data_source=remote_list._storage_,
-            get_mod_count=lambda: remote_list._modification_count,
-            expected_mod_count=remote_list._modification_count
-        )
+        Raises:
+            CancelIteration: Si el objeto iterado ha sido modificado.
+            StopIteration: Si ya se habían iterado todos los elementos.
 
+        """
+        owner = self._owner
+        if owner is None:
+            raise _StopIteration()  # Ya se había agotado
+        if self._expected_mod_count != owner._modification_count:
+            raise _CancelIteration()
 
-class SetIterator(Iterable):
-    """Iterador para RemoteSet."""
+        batch = list(itertools.islice(self._iterator, max(count, 0)))
+        if not batch and count > 0:
+            self._release(current)
+            raise _StopIteration()
+        return batch
 
-    def __init__(self, remote_set: 'RemoteSet') -> None:
-        """Inicializa el iterador para RemoteSet.
 
-        Args:
-            remote_set (RemoteSet): El conjunto remoto a iterar.
+class ListIterator(Iterable):
+    """Iterador para RemoteList."""
 
-        """
-        super().__init__(
-            data_source=remote_set._storage_,
-            get_mod_count=lambda: remote_set._modification_count,
-            expected_mod_count=remote_set._modification_count
-        )
+    __slots__ = ()
 
+    @staticmethod
+    def _data_source(remote_list: 'RemoteList') -> Any:
+        """Devuelve los elementos de la lista remota."""
+        return remote_list._storage_
 
 
-class DictIterator(rt.Iterable):
-    """Iterador para RemoteDict."""
+class SetIterator(Iterable):
+    """Iterador para RemoteSet."""
 
-    def __init__(self, remote_dict: 'RemoteDict') -> None:
-        self._dict = remote_dict
-        self._get_mod_count = lambda: remote_dict._modification_count
-        self._expected_mod_count = remote_dict._modification_count
-        self._iterator = iter(remote_dict._storage_.items())
+    __slots__ = ()
 
-    def next(self, current: Optional[Ice.Current] = None) -> str:
-        """Devuelve el siguiente elemento en la iteración.
+    @staticmethod
+    def _data_source(remote_set: 'RemoteSet') -> Any:
+        """Devuelve los elementos del conjunto remoto."""
+        return remote_set.data
 
-        Raises:
-            CancelIteration: Si el diccionario ha sido modificado.
-            StopIteration: Si se han iterado todos los elementos.
 
-        """
-        if self._expected_mod_count != self._get_mod_count():
-            raise rt.CancelIteration("El diccionario ha sido modificado durante la iteración.")
+class DictIterator(Iterable):
+    """Iterador para RemoteDict. Devuelve cada par con el formato `clave: valor`."""
 
-        try:
-            key, value = next(self._iterator)
-            return f"{key}: {value}"
-        except StopIteration:
-            raise rt.StopIteration("No hay más elementos en el diccionario.")
+    __slots__ = ()
+
+    @staticmethod
+    def _data_source(remote_dict: 'RemoteDict') -> Any:
+        """Devuelve los pares del diccionario remoto con el formato `clave: valor`."""
+        # Las claves y los valores son siempre str: basta con concatenarlos
+        return (key + _SEP + value for key, value in remote_dict._storage_.items())
@@ -0,0 +1,134 @@
+"""Guardado diferido de los tipos remotos.
+
+Los tipos remotos no reescriben su archivo de almacenamiento en cada
+modificación: marcan sus datos como modificados y los guardan pasado un breve
+intervalo, al salir de un bloque `batch()` o al llamar a `flush()`. Así, varias
+modificaciones seguidas se guardan con una única escritura.
+
+Un único planificador (`SCHEDULER`) guarda juntos, en cada intervalo, todos los
+objetos modificados del proceso, ordenados por archivo para que las escrituras
+de un mismo archivo lleguen seguidas al hilo escritor y se fusionen.
+
+Los guardados solo encolan la escritura para el hilo escritor de `_filestore`;
+`flush()` además espera a que haya llegado al disco.
+"""
+
+import atexit
+import contextlib
+import logging
+import threading
+from typing import Iterator, Optional
+
+import Ice
+
+from remotetypes._filestore import flush_writes
+
+SAVE_DELAY = 0.05  # Segundos que se esperan antes de guardar los datos modificados
+
+
+class Scheduler:
+    """Planificador compartido de los guardados diferidos de todos los tipos remotos."""
+
+    def __init__(self, delay: float) -> None:
+        """Inicializa un planificador que guarda los objetos modificados cada `delay` segundos."""
+        self._delay = delay
+        self._dirty: dict[int, "DeferredSave"] = {}
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def mark_dirty(self, instance: "DeferredSave") -> None:
+        """Programa el guardado de un objeto en el siguiente intervalo."""
+        with self._lock:
+            self._dirty[id(instance)] = instance
+            if self._timer is None:
+                self._timer = threading.Timer(self._delay, self.flush_all)
+                # El proceso no termina hasta que se hayan guardado los datos
+                self._timer.daemon = False
+                self._timer.start()
+
+    def discard(self, instance: "DeferredSave") -> None:
+        """Olvida el guardado programado de un objeto que ya se ha guardado."""
+        with self._lock:
+            self._dirty.pop(id(instance), None)
+
+    def flush_all(self) -> None:
+        """Guarda todos los objetos modificados, agrupados por archivo."""
+        with self._lock:
+            instances = sorted(self._dirty.values(), key=lambda instance: instance.storage_file)
+            self._dirty.clear()
+            self._timer = None
+        for instance in instances:
+            try:
+                instance._save_pending()
+            except Exception:
+                logging.getLogger(__name__).exception(
+                    "Error al guardar %s", instance.storage_file
+                )
+
+
+SCHEDULER = Scheduler(SAVE_DELAY)
+
+# Los guardados programados no se pierden al terminar el proceso
+atexit.register(SCHEDULER.flush_all)
+
+
+class DeferredSave:
+    """Mixin que agrupa los guardados de un tipo remoto.
+
+    Las clases que lo usan deben tener un atributo `storage_file`, llamar a
+    `_init_deferred_save()` en su constructor, implementar `_save_data()` y
+    llamar a `_mark_dirty()` tras cada modificación en lugar de guardar
+    directamente.
+    """
+
+    __slots__ = ("_dirty", "_batch_depth", "_save_lock")
+
+    storage_file: str  # Lo define la clase que usa el mixin
+
+    def _init_deferred_save(self) -> None:
+        """Inicializa el estado del guardado diferido."""
+        self._dirty = False
+        self._batch_depth = 0
+        self._save_lock = threading.RLock()
+
+    def _save_data(self) -> None:
+        """Guarda los datos en el archivo de almacenamiento."""
+        raise NotImplementedError("Este método debe ser implementado por la subclase.")
+
+    def _mark_dirty(self) -> None:
+        """Marca los datos como modificados y programa su guardado."""
+        with self._save_lock:
+            self._dirty = True
+            if not self._batch_depth:
+                SCHEDULER.mark_dirty(self)
+
+    def flush(self, current: Optional[Ice.Current] = None) -> None:
+        """Guarda los cambios pendientes y espera a que se hayan escrito en disco."""
+        self._save_pending()
+        flush_writes()
+
+    def _save_pending(self) -> None:
+        """Guarda los datos si han sido modificados desde el último guardado."""
+        with self._save_lock:
+            SCHEDULER.discard(self)
+            if not self._dirty:
+                return
+            self._dirty = False
+            try:
+                self._save_data()
+            except Exception:
+                self._dirty = True
+                raise
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[None]:
+        """Agrupa las modificaciones del bloque en un único guardado al salir de él."""
+        with self._save_lock:
+            self._batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._save_lock:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._save_pending()
@@ -1,13 +1,20 @@
-import json
 import os
 
+from remotetypes import serialization
+from remotetypes._filestore import flush_writes, submit_write
+
 """
 Este módulo contiene la clase PersistentObject, que sirve como clase base 
 para estructuras de datos persistentes. Esta clase maneja la carga y 
 almacenamiento de datos en un archivo y asegura que los datos se mantengan 
 persistentes entre ejecuciones.
+
+Las escrituras no se hacen en el hilo que modifica el objeto (el hilo de Ice que
+atiende la petición), sino en el hilo escritor compartido de `_filestore`, que
+las recibe en orden a través de una cola.
 """
 
+
 class PersistentObject:
     """Clase base para estructuras de datos persistentes."""
 
@@ -37,15 +44,20 @@ class PersistentObject:
 
     def _load_from_file(self):
         """Carga datos desde el archivo JSON."""
+        # Las escrituras pendientes de este archivo deben llegar antes al disco
+        flush_writes()
         if os.path.exists(self.storage_file):
-            with open(self.storage_file, 'r') as file:
-                return json.load(file)
+            with open(self.storage_file, 'rb') as file:
+                return serialization.loads(file.read())
         return {}
 
     def _save_to_file(self):
-        """Guarda datos en el archivo JSON."""
-        with open(self.storage_file, 'w') as file:
-            json.dump(self._data, file, indent=4)
+        """Reescribe atómicamente el archivo JSON desde el hilo escritor.
+
+        Los datos se serializan en el hilo que llama, para que el archivo
+        refleje su estado actual.
+        """
+        submit_write("replace", self.storage_file, serialization.dumps(self._data))
 
     def _update_data(self):
         """Actualiza los datos en el archivo JSON."""
@@ -1,12 +1,38 @@
 from typing import Optional
 import Ice
 import RemoteTypes as rt
-import json
-import os
-import uuid
 
+from remotetypes._journal import open_journal
+from remotetypes.iterable import DictIterator, new_identity
+from remotetypes.persistence import DeferredSave
 
-class RemoteDict(rt.RDict):
+# Excepciones y proxies de Slice enlazados una sola vez, fuera de los caminos frecuentes
+_KeyError = rt.KeyError
+_IterablePrx = rt.IterablePrx
+
+
+def _apply_dict_op(items, op_record):
+    """Aplica una operación del diario (`["set", clave, valor]` o `["del", clave]`) a un diccionario."""
+    if not isinstance(items, dict):
+        items = {}
+    if op_record[0] == "set":
+        items[op_record[1]] = op_record[2]
+    else:
+        items.pop(op_record[1], None)
+    return items
+
+
+def _encode_dict(items) -> dict:
+    """Devuelve los pares de un diccionario como un objeto serializable como JSON."""
+    return dict(items or {})
+
+
+def _is_flat_dict(snapshot: dict) -> bool:
+    """Indica si la instantánea tiene el formato antiguo: los pares `clave: valor` de un único diccionario."""
+    return all(isinstance(value, str) for value in snapshot.values())
+
+
+class RemoteDict(DeferredSave, rt.RDict):
     """
     Implementación de la interfaz remota RDict con persistencia.
 
@@ -16,17 +42,22 @@ class RemoteDict(rt.RDict):
     agregar, eliminar, verificar la existencia de claves y obtener valores, así como iterar
     sobre las claves y valores. Las modificaciones en el diccionario son seguidas por un
     contador de modificaciones para asegurar la consistencia durante las iteraciones.
+    Los cambios no se guardan en cada operación, sino que se añaden de forma diferida
+    (ver `DeferredSave`) al diario de operaciones del archivo (ver `_journal`).
 
     Atributos:
         id_ (str): Identificador único del diccionario.
         storage_file (str): Ruta del archivo donde se almacenan los datos del diccionario.
         _storage_ (dict): Contenedor en memoria para las claves y valores del diccionario.
         _modification_count (int): Contador de modificaciones para verificar cambios durante la iteración.
+        _hash_cache (Optional[int]): Hash del diccionario, o None si hay que recalcularlo.
+        _pending_ops (list): Operaciones todavía no añadidas al diario.
 
     Métodos:
         __init__(identifier, storage_file): Inicializa un `RemoteDict` con persistencia.
-        _load_data(): Carga los datos del archivo JSON.
-        _save_data(): Guarda los datos en el archivo JSON.
+        _load_data(): Carga los datos del archivo JSON y su diario.
+        _save_data(): Añade las operaciones pendientes al diario.
+        flush(current): Guarda los cambios pendientes en el archivo JSON.
         identifier(current): Devuelve el identificador del objeto.
         remove(key, current): Elimina una clave del diccionario.
         length(current): Devuelve el número de elementos en el diccionario.
@@ -38,33 +69,45 @@ class RemoteDict(rt.RDict):
         pop(key, current): Elimina y devuelve el valor asociado a una clave en el diccionario.
     """
 
+    __slots__ = (
+        "id_", "storage_file", "_storage_", "_modification_count", "_hash_cache",
+        "_journal", "_pending_ops",
+    )
+
     def __init__(self, identifier: str, storage_file: str) -> None:
         """Inicializa un RemoteDict con un identificador y archivo de almacenamiento."""
         self.id_ = identifier
         self.storage_file = storage_file
+        self._journal = open_journal(storage_file, _apply_dict_op, _encode_dict, _is_flat_dict)
+        self._pending_ops: list = []
         self._storage_ = self._load_data()
         self._modification_count = 0  # Contador para controlar las modificaciones
+        self._hash_cache: Optional[int] = None
+        self._init_deferred_save()
 
     def _load_data(self) -> dict:
-        """Carga los datos del archivo JSON."""
-        if os.path.exists(self.storage_file):
-            try:
-                with open(self.storage_file, 'r') as file:
-                    data = json.load(file)
-                return data  # Cargar directamente como diccionario
-            except json.JSONDecodeError:
-                # Manejar caso de archivo vacío o datos no válidos
-                return {}
-        return {}
+        """Carga los datos del archivo JSON y reproduce su diario.
+
+        Los archivos con el formato antiguo, que solo guardaban los pares
+        `clave: valor` de un diccionario, se convierten al formato actual.
+        """
+        return dict(self._journal.load(self.id_))
 
     def _save_data(self) -> None:
-        """Guarda los datos en el archivo JSON."""
+        """Añade al diario, en una sola escritura, las operaciones pendientes."""
+        with self._save_lock:
+            ops, self._pending_ops = self._pending_ops, []
         try:
-            with open(self.storage_file, 'w') as file:
-                json.dump(self._storage_, file, indent=4)
+            self._journal.record(self.id_, ops)
         except Exception as e:
             raise RuntimeError(f"Error al guardar los datos: {e}")
 
+    def _log_op(self, *op_record: str) -> None:
+        """Anota una operación para el diario y programa su guardado."""
+        with self._save_lock:
+            self._pending_ops.append(list(op_record))
+            self._mark_dirty()
+
     def identifier(self, current: Optional[Ice.Current] = None) -> str:
         """Devuelve el identificador del objeto."""
         return self.id_
@@ -73,10 +116,11 @@ class RemoteDict(rt.RDict):
         """Elimina una clave del diccionario si existe. De lo contrario, lanza una excepción remota."""
         try:
             del self._storage_[key]
+            self._hash_cache = None
             self._modification_count += 1  # Incrementa el contador de modificaciones
-            self._save_data()
+            self._log_op("del", key)
         except KeyError as error:
-            raise rt.KeyError(key) from error
+            raise _KeyError(key) from error
 
     def length(self, current: Optional[Ice.Current] = None) -> int:
         """Devuelve el número de elementos en el diccionario."""
@@ -87,62 +131,47 @@ class RemoteDict(rt.RDict):
         return key in self._storage_
 
     def hash(self, current: Optional[Ice.Current] = None) -> int:
-        """Calcula un hash a partir del contenido del diccionario."""
-        # Ordenamos las claves para asegurar la consistencia del hash
-        items = tuple(sorted(self._storage_.items()))
-        return hash(items)
+        """Calcula un hash a partir del contenido del diccionario.
+
+        El hash se guarda hasta la siguiente modificación del diccionario.
+        """
+        if self._hash_cache is None:
+            # Ordenamos las claves para asegurar la consistencia del hash
+            self._hash_cache = hash(tuple(sorted(self._storage_.items())))
+        return self._hash_cache
 
     def iter(self, current: Optional[Ice.Current] = None) -> rt.IterablePrx:
         """Crea y devuelve un iterador para el diccionario."""
         if current is None:
             raise RuntimeError("El objeto 'current' es necesario.")
         adapter = current.adapter
-        iterator = DictIterator(self, self._modification_count)  # Proporciona el contador esperado
-        identity = Ice.Identity(name=str(uuid.uuid4()))
+        iterator = DictIterator.acquire(self)
+        identity = new_identity()
         proxy = adapter.add(iterator, identity)
-        return rt.IterablePrx.checkedCast(proxy)
+        return _IterablePrx.checkedCast(proxy)
 
     def setItem(self, key: str, item: str, current: Optional[Ice.Current] = None) -> None:
         """Asigna un valor a una clave en el diccionario."""
         self._storage_[key] = item
+        self._hash_cache = None
         self._modification_count += 1  # Incrementa el contador de modificaciones
-        self._save_data()
+        self._log_op("set", key, item)
 
     def getItem(self, key: str, current: Optional[Ice.Current] = None) -> str:
         """Obtiene el valor asociado a una clave en el diccionario."""
         try:
             return self._storage_[key]
         except KeyError as error:
-            raise rt.KeyError(key) from error
+            raise _KeyError(key) from error
 
     def pop(self, key: str, current: Optional[Ice.Current] = None) -> str:
         """Elimina y devuelve el valor asociado a una clave en el diccionario."""
         try:
             value = self._storage_.pop(key)
+            self._hash_cache = None
             self._modification_count += 1  # Incrementa el contador de modificaciones
-            self._save_data()
+            self._log_op("del", key)
             return value
         except KeyError as error:
-            raise rt.KeyError(key) from error
-
+            raise _KeyError(key) from error
 
-class DictIterator(rt.Iterable):
-    """Implementación del iterador para RemoteDict."""
-
-    def __init__(self, remote_dict: RemoteDict, expected_mod_count: int) -> None:
-        """Inicializa el iterador con el diccionario y el contador de modificaciones esperado."""
-        self._dict = remote_dict
-        self._expected_mod_count = expected_mod_count
-        # Iteramos sobre las claves del diccionario
-        self._iterator = iter(remote_dict._storage_.items())
-
-    def next(self, current: Optional[Ice.Current] = None) -> str:
-        """Devuelve el siguiente elemento en la iteración."""
-        if self._expected_mod_count != self._dict._modification_count:
-            raise rt.CancelIteration()
-
-        try:
-            key, value = next(self._iterator)
-            return f"{key}: {value}"
-        except StopIteration:
-            raise rt.StopIteration()
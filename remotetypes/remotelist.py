@@ -1,12 +1,25 @@
-import json
-import os
+from collections import Counter
 from typing import Optional
 import Ice
 import RemoteTypes as rt
-import uuid
 
+from remotetypes._filestore import FILE_STORE
+from remotetypes.iterable import ListIterator, new_identity
+from remotetypes.persistence import DeferredSave
 
-class RemoteList(rt.RList):
+# Excepciones y proxies de Slice enlazados una sola vez, fuera de los caminos frecuentes
+_KeyError = rt.KeyError
+_IndexError = rt.IndexError
+_IterablePrx = rt.IterablePrx
+
+# Hash polinómico de la lista: h = h * _HASH_MULTIPLIER + hash(elemento) (mod 2**64).
+# Se puede actualizar al añadir o quitar el último elemento sin recorrer la lista.
+_HASH_MULTIPLIER = 1_000_003
+_HASH_INVERSE = pow(_HASH_MULTIPLIER, -1, 1 << 64)
+_HASH_MASK = (1 << 64) - 1
+
+
+class RemoteList(DeferredSave, rt.RList):
     """
     Implementación de la interfaz remota RList con persistencia.
 
@@ -15,7 +28,8 @@ class RemoteList(rt.RList):
     de manera persistente en un archivo JSON, lo que permite que los datos sean
     preservados entre sesiones. La clase soporta operaciones comunes de listas como
     agregar, eliminar, verificar existencia y obtener elementos, así como iteración
-    sobre los elementos de la lista.
+    sobre los elementos de la lista. Los cambios no se guardan en cada operación,
+    sino de forma diferida (ver `DeferredSave`).
 
     Atributos:
         id_ (str): Identificador único de la lista.
@@ -23,11 +37,14 @@ class RemoteList(rt.RList):
         _modification_count (int): Contador para llevar el registro de las modificaciones
                                    realizadas en la lista.
         _storage_ (list): Contenedor en memoria para los elementos de la lista.
+        _hash_cache (Optional[int]): Hash de la lista, o None si hay que recalcularlo.
+        _index (Counter): Número de apariciones de cada elemento, para consultarlas sin recorrer la lista.
 
     Métodos:
         __init__(identifier, storage_file): Inicializa un `RemoteList` con persistencia.
         _load_data(): Carga los datos desde el archivo JSON.
         _save_data(): Guarda los datos en el archivo JSON.
+        flush(current): Guarda los cambios pendientes en el archivo JSON.
         identifier(current): Devuelve el identificador del objeto.
         append(item, current): Añade un elemento al final de la lista.
         remove(item, current): Elimina un elemento de la lista.
@@ -39,44 +56,39 @@ class RemoteList(rt.RList):
         iter(current): Devuelve un iterador para la lista.
     """
 
+    __slots__ = (
+        "id_", "storage_file", "_storage_", "_modification_count", "_hash_cache", "_index",
+    )
+
     def __init__(self, identifier: str, storage_file: str) -> None:
         """Inicializa un RemoteList con persistencia."""
         self.id_ = identifier
         self.storage_file = storage_file
         self._modification_count = 0  # Contador para controlar las modificaciones
         self._storage_ = self._load_data()
+        self._hash_cache: Optional[int] = None
+        self._index = Counter(self._storage_)  # No se guarda: se reconstruye al cargar
+        self._init_deferred_save()
 
     def _load_data(self) -> list:
         """Carga los datos desde el archivo JSON."""
-        if os.path.exists(self.storage_file):
-            try:
-                with open(self.storage_file, 'r') as file:
-                    data = json.load(file)
-                    return data.get(self.id_, [])
-            except json.JSONDecodeError:
-                # Si el archivo está vacío o corrupto, inicializar como lista vacía
-                return []
-        return []
+        return list(FILE_STORE.load(self.storage_file).get(self.id_, []))
 
     def _save_data(self) -> None:
         """Guarda los datos en el archivo JSON."""
         try:
-            if os.path.exists(self.storage_file):
-                with open(self.storage_file, 'r') as file:
-                    try:
-                        data = json.load(file)
-                    except json.JSONDecodeError:
-                        data = {}
-            else:
-                data = {}
-
-            data[self.id_] = self._storage_
-
-            with open(self.storage_file, 'w') as file:
-                json.dump(data, file, indent=4)
+            FILE_STORE.set_key(self.storage_file, self.id_, list(self._storage_))
+            FILE_STORE.flush(self.storage_file)
         except Exception as e:
             raise RuntimeError(f"Error al guardar los datos: {e}")
 
+    def _unindex(self, item: str) -> None:
+        """Descuenta una aparición del elemento en el índice."""
+        if self._index[item] == 1:
+            del self._index[item]
+        else:
+            self._index[item] -= 1
+
     def identifier(self, current: Optional[Ice.Current] = None) -> str:
         """Devuelve el identificador del objeto."""
         return self.id_
@@ -84,75 +96,75 @@ class RemoteList(rt.RList):
     def append(self, item: str, current: Optional[Ice.Current] = None) -> None:
         """Añade un elemento al final de la lista."""
         self._storage_.append(item)
+        self._index[item] += 1
+        if self._hash_cache is not None:
+            self._hash_cache = (self._hash_cache * _HASH_MULTIPLIER + hash(item)) & _HASH_MASK
         self._modification_count += 1
-        self._save_data()
+        self._mark_dirty()
 
     def remove(self, item: str, current: Optional[Ice.Current] = None) -> None:
         """Elimina un elemento de la lista."""
-        try:
-            self._storage_.remove(item)
-            self._modification_count += 1
-            self._save_data()
-        except ValueError as error:
-            raise rt.KeyError(f"Item {item} not found in list") from error
+        if not self._index[item]:
+            raise _KeyError(f"Item {item} not found in list")
+        self._storage_.remove(item)
+        self._unindex(item)
+        self._hash_cache = None
+        self._modification_count += 1
+        self._mark_dirty()
 
     def contains(self, item: str, current: Optional[Ice.Current] = None) -> bool:
         """Verifica si un elemento está en la lista."""
-        return item in self._storage_
+        return self._index[item] > 0
 
     def length(self, current: Optional[Ice.Current] = None) -> int:
         """Devuelve el número de elementos en la lista."""
         return len(self._storage_)
 
     def hash(self, current: Optional[Ice.Current] = None) -> int:
-        """Calcula un hash a partir del contenido de la lista."""
-        return hash(tuple(self._storage_))
+        """Calcula un hash a partir del contenido de la lista.
+
+        El hash se guarda y se actualiza al añadir o quitar el último elemento;
+        el resto de modificaciones obligan a recalcularlo en la siguiente llamada.
+        """
+        if self._hash_cache is None:
+            value = 0
+            for item in self._storage_:
+                value = (value * _HASH_MULTIPLIER + hash(item)) & _HASH_MASK
+            self._hash_cache = value
+        # Ice transporta el hash como un entero de 64 bits con signo
+        return self._hash_cache - (1 << 64) if self._hash_cache >> 63 else self._hash_cache
 
     def getItem(self, index: int, current: Optional[Ice.Current] = None) -> str:
         """Devuelve el elemento en una posición específica."""
         try:
             return self._storage_[index]
         except IndexError as error:
-            raise rt.IndexError(f"Index {index} is out of range") from error
+            raise _IndexError(f"Index {index} is out of range") from error
 
     def pop(self, index: Optional[int] = None, current: Optional[Ice.Current] = None) -> str:
         """Elimina y devuelve un elemento de la lista."""
         try:
             if index is None or index is Ice.Unset:
                 item = self._storage_.pop()
+                if self._hash_cache is not None:
+                    self._hash_cache = ((self._hash_cache - hash(item)) * _HASH_INVERSE) & _HASH_MASK
             else:
                 item = self._storage_.pop(index)
+                self._hash_cache = None
+            self._unindex(item)
             self._modification_count += 1
-            self._save_data()
+            self._mark_dirty()
             return item
         except IndexError as error:
-            raise rt.IndexError(f"Index {index} is out of range") from error
+            raise _IndexError(f"Index {index} is out of range") from error
 
     def iter(self, current: Optional[Ice.Current] = None) -> rt.IterablePrx:
         """Devuelve un iterador para la lista."""
         if current is None:
             raise RuntimeError("El objeto 'current' es necesario.")
         adapter = current.adapter
-        iterator = ListIterator(self, self._modification_count)
-        identity = Ice.Identity(name=str(uuid.uuid4()))
+        iterator = ListIterator.acquire(self)
+        identity = new_identity()
         proxy = adapter.add(iterator, identity)
-        return rt.IterablePrx.checkedCast(proxy)
-
+        return _IterablePrx.checkedCast(proxy)
 
-class ListIterator(rt.Iterable):
-    """Implementación del iterador para RemoteList."""
-
-    def __init__(self, remote_list: RemoteList, expected_mod_count: int) -> None:
-        """Inicializa el iterador con la lista y el contador de modificaciones esperado."""
-        self._list = remote_list
-        self._expected_mod_count = expected_mod_count
-        self._iterator = iter(remote_list._storage_)
-
-    def next(self, current: Optional[Ice.Current] = None) -> str:
-        """Devuelve el siguiente elemento en la iteración."""
-        if self._expected_mod_count != self._list._modification_count:
-            raise rt.CancelIteration()
-        try:
-            return next(self._iterator)
-        except StopIteration:
-            raise rt.StopIteration()
@@ -1,11 +1,34 @@
-import json
 import os
-import Ice
-import uuid
+
 import RemoteTypes as rt
 
+from remotetypes._journal import open_journal
+from remotetypes.iterable import SetIterator, new_identity
+from remotetypes.persistence import DeferredSave
+
+# Excepciones y proxies de Slice enlazados una sola vez, fuera de los caminos frecuentes
+_KeyError = rt.KeyError
+_IterablePrx = rt.IterablePrx
+
+
+def _apply_set_op(items, op_record):
+    """Aplica una operación del diario (`["add", elemento]` o `["remove", elemento]`) a un conjunto."""
+    if not isinstance(items, set):
+        items = set(items or ())
+    action, item = op_record
+    if action == "add":
+        items.add(item)
+    else:
+        items.discard(item)
+    return items
+
 
-class RemoteSet(rt.RSet):
+def _encode_set(items) -> list:
+    """Convierte los elementos de un conjunto en una lista serializable como JSON."""
+    return list(items or ())
+
+
+class RemoteSet(DeferredSave, rt.RSet):
     """
     Representa un conjunto remoto con persistencia.
 
@@ -13,8 +36,9 @@ class RemoteSet(rt.RSet):
     realizar operaciones como agregar, eliminar, verificar la existencia y
     iterar sobre los elementos. Además, mantiene el estado persistente de
     los elementos en un archivo de almacenamiento global. Las modificaciones
-    realizadas en el conjunto (como agregar o eliminar elementos) se reflejan
-    en el archivo de almacenamiento para asegurar que los datos se mantengan
+    realizadas en el conjunto (como agregar o eliminar elementos) se añaden,
+    de forma diferida (ver `DeferredSave`), al diario de operaciones del
+    archivo (ver `_journal`) para asegurar que los datos se mantengan
     consistentes entre sesiones.
 
     Atributos:
@@ -22,11 +46,15 @@ class RemoteSet(rt.RSet):
         data (set): Conjunto de datos que contiene los elementos del conjunto.
         _modification_count (int): Contador para rastrear el número de modificaciones realizadas.
         storage_file (str): Ruta al archivo que almacena los datos del conjunto de forma persistente.
+        _hash_value (int): Hash del conjunto: XOR de los hashes de sus elementos, actualizado en cada modificación.
+        _pending_ops (list): Operaciones todavía no añadidas al diario.
 
     Métodos:
-        __init__(identifier): Inicializa un conjunto remoto con un identificador único.
-        _load_data(): Carga los datos del archivo de almacenamiento global.
-        _save_global_storage(): Guarda los datos actuales en el archivo de almacenamiento global.
+        __init__(identifier, storage_file): Inicializa un conjunto remoto con un identificador único.
+        _load_data(): Carga los datos del archivo de almacenamiento y su diario.
+        _import_global_data(): Copia los datos que el conjunto tenía en el archivo global.
+        _save_data(): Añade las operaciones pendientes al diario.
+        flush(): Guarda los cambios pendientes en el archivo de almacenamiento.
         add(item): Añade un elemento al conjunto si no existe.
         remove(item): Elimina un elemento del conjunto.
         contains(item): Verifica si un elemento está en el conjunto.
@@ -36,61 +64,85 @@ class RemoteSet(rt.RSet):
         pop(): Elimina y devuelve un elemento del conjunto.
     """
 
+    __slots__ = (
+        "identifier", "data", "_modification_count", "storage_file",
+        "_journal", "_pending_ops", "_hash_value",
+    )
+
     GLOBAL_STORAGE_FILE = "remoteset_data.json"
 
-    def __init__(self, identifier: str) -> None:
-        """Inicializa un RemoteSet con un identificador único."""
+    def __init__(self, identifier: str, storage_file: str = GLOBAL_STORAGE_FILE) -> None:
+        """Inicializa un RemoteSet con un identificador único.
+
+        Si no se indica `storage_file`, los datos se guardan en el archivo global.
+        """
         self.identifier = identifier
-        self.data = set()
+        self.data: set[str] = set()
         self._modification_count = 0
-        self.storage_file = self.GLOBAL_STORAGE_FILE
+        self.storage_file = storage_file
+        self._journal = open_journal(storage_file, _apply_set_op, _encode_set)
+        self._pending_ops: list = []
+        self._init_deferred_save()
 
         # Cargar datos existentes del archivo global
         self._load_data()
 
     def _load_data(self) -> None:
-        """Carga los datos desde el archivo global."""
-        if os.path.exists(self.storage_file):
-            try:
-                with open(self.storage_file, "r") as f:
-                    storage = json.load(f)
-                    # Cargar solo los datos para el identificador actual
-                    if self.identifier in storage:
-                        self.data = set(storage[self.identifier])
-            except json.JSONDecodeError:
-                pass  # Si el archivo está vacío o corrupto, ignorar
-
-    def _save_global_storage(self) -> None:
-        """Guarda los datos en el archivo global."""
-        storage = {}
-        if os.path.exists(self.storage_file):
-            try:
-                with open(self.storage_file, "r") as f:
-                    storage = json.load(f)
-            except json.JSONDecodeError:
-                pass  # Si el archivo está vacío o corrupto, ignorar
-
-        # Actualizar el almacenamiento con los datos actuales
-        storage[self.identifier] = list(self.data)
-
-        # Escribir el almacenamiento actualizado en el archivo
-        with open(self.storage_file, "w") as f:
-            json.dump(storage, f, indent=4)
+        """Carga los datos desde el archivo de almacenamiento.
+
+        Si el conjunto usa un archivo propio en el que todavía no tiene datos,
+        se copian antes los que tuviera en el archivo global.
+        """
+        if self.storage_file != self.GLOBAL_STORAGE_FILE and not self._journal.contains(self.identifier):
+            self._import_global_data()
+        # Cargar solo los datos para el identificador actual
+        self.data = set(self._journal.load(self.identifier))
+        self._hash_value = 0
+        for item in self.data:
+            self._hash_value ^= hash(item)
+
+    def _import_global_data(self) -> None:
+        """Copia al archivo del conjunto los datos que tenía en el archivo global.
+
+        Antes, todos los conjuntos se guardaban en `GLOBAL_STORAGE_FILE`; la
+        factoría guarda ahora cada uno en su propio archivo.
+        """
+        if not os.path.exists(self.GLOBAL_STORAGE_FILE):
+            return
+        global_journal = open_journal(self.GLOBAL_STORAGE_FILE, _apply_set_op, _encode_set)
+        items = global_journal.load(self.identifier)
+        if items:
+            self._journal.record(self.identifier, [["add", item] for item in items])
+
+    def _save_data(self) -> None:
+        """Añade al diario, en una sola escritura, las operaciones pendientes."""
+        with self._save_lock:
+            ops, self._pending_ops = self._pending_ops, []
+        self._journal.record(self.identifier, ops)
+
+    def _log_op(self, action: str, item: str) -> None:
+        """Anota una operación para el diario y programa su guardado."""
+        with self._save_lock:
+            self._pending_ops.append([action, item])
+            self._mark_dirty()
 
     def add(self, item: str, current=None) -> None:
         """Añade un elemento al conjunto si no existe."""
-        if item not in self.data:  # Evitar duplicados
-            self.data.add(item)
+        size = len(self.data)
+        self.data.add(item)
+        if len(self.data) != size:  # Solo los elementos nuevos modifican el conjunto
+            self._hash_value ^= hash(item)
             self._modification_count += 1  # Incrementar el contador de modificaciones
-            self._save_global_storage()
+            self._log_op("add", item)
 
     def remove(self, item: str, current=None) -> None:
         """Elimina un elemento del conjunto."""
         if item not in self.data:
-            raise rt.KeyError(f"El elemento '{item}' no existe en el conjunto.")
+            raise _KeyError(f"El elemento '{item}' no existe en el conjunto.")
         self.data.remove(item)
+        self._hash_value ^= hash(item)
         self._modification_count += 1  # Incrementar el contador de modificaciones
-        self._save_global_storage()
+        self._log_op("remove", item)
 
     def contains(self, item: str, current=None) -> bool:
         """Verifica si un elemento está en el conjunto."""
@@ -105,56 +157,22 @@ class RemoteSet(rt.RSet):
         if current is None:
             raise RuntimeError("El objeto 'current' es necesario.")
         adapter = current.adapter
-        iterator = RemoteSetIterator(self)
-        identity = Ice.Identity(name=str(uuid.uuid4()))
+        iterator = SetIterator.acquire(self)
+        identity = new_identity()
         proxy = adapter.add(iterator, identity)
-        return rt.IterablePrx.checkedCast(proxy)
+        return _IterablePrx.checkedCast(proxy)
 
     def hash(self, current=None) -> int:
-        """Calcula un hash a partir del contenido del conjunto."""
-        return hash(frozenset(self.data))
+        """Devuelve el hash del conjunto, que se mantiene al día en cada modificación."""
+        return self._hash_value
 
     def pop(self, current=None) -> str:
         """Elimina y devuelve un elemento del conjunto."""
         if not self.data:
-            raise rt.KeyError("El conjunto está vacío.")
+            raise _KeyError("El conjunto está vacío.")
         item = self.data.pop()
+        self._hash_value ^= hash(item)
         self._modification_count += 1  # Incrementar el contador de modificaciones
-        self._save_global_storage()
+        self._log_op("remove", item)
         return item
 
-
-class RemoteSetIterator(rt.Iterable):
-    """
-    Iterador para el conjunto remoto (RemoteSet).
-
-    Esta clase proporciona la funcionalidad para iterar sobre los elementos
-    de un conjunto remoto, gestionando el estado de la iteración y manejando
-    excepciones como `StopIteration` y `CancelIteration` si se realizan modificaciones
-    al conjunto durante la iteración.
-
-    Atributos:
-        _iterator (iter): Iterador que recorre los elementos del conjunto.
-        _expected_mod_count (int): Contador de modificaciones esperado para
-        verificar la consistencia durante la iteración.
-
-    Métodos:
-        __init__(remote_set): Inicializa el iterador con el conjunto remoto y el contador de modificaciones esperado.
-        next(): Devuelve el siguiente elemento en la iteración.
-                Lanza una excepción `StopIteration` cuando termina la iteración
-                y `CancelIteration` si el conjunto fue modificado durante la iteración.
-    """
-
-    def __init__(self, remote_set):
-        """Inicializa el iterador."""
-        self._iterator = iter(remote_set.data)
-
-    def next(self, current=None):
-        """Devuelve el siguiente elemento o lanza una excepción al terminar."""
-        try:
-            next_item = next(self._iterator)
-            return next_item
-        except StopIteration:
-            raise rt.StopIteration()
-        except RuntimeError:
-            raise rt.CancelIteration()
@@ -0,0 +1,34 @@
+"""JSON (de)serialisation helpers, backed by orjson when it is installed."""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:  # pragma: no cover - the stdlib fallback is used
+    _HAS_ORJSON = False
+
+# orjson.JSONDecodeError is a subclass of json.JSONDecodeError, so callers
+# can catch this one regardless of the backend in use.
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data: bytes | str) -> Any:
+    """Deserialise a JSON document given as bytes or str."""
+    if _HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialise an object to a UTF-8 encoded JSON document.
+
+    The output is compact unless `indent` is set, in which case it is
+    indented with two spaces.
+    """
+    if _HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(",", ":")).encode()
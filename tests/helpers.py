@@ -0,0 +1,50 @@
+"""Utilidades compartidas por los módulos de prueba."""
+
+import itertools
+import os
+import tempfile
+import uuid
+
+import Ice
+
+from remotetypes import RemoteTypes as rt
+
+# Los archivos de almacenamiento se crean en memoria (tmpfs) si el sistema lo permite
+STORAGE_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+BATCH_SIZE = 64  # Elementos pedidos en cada llamada a nextBatch
+
+# Identificadores únicos: un prefijo aleatorio por proceso seguido de un contador
+_ID_BASE = uuid.uuid4().hex
+_id_counter = itertools.count()
+
+
+def new_id():
+    """Devuelve un identificador único sin generar un UUID nuevo."""
+    return f"{_ID_BASE}-{next(_id_counter)}"
+
+
+def new_communicator():
+    """Crea un comunicador a partir de propiedades explícitas, sin buscar configuración externa."""
+    init_data = Ice.InitializationData()
+    init_data.properties = Ice.createProperties()
+    init_data.properties.setProperty("Ice.ThreadPool.Server.Size", "1")
+    return Ice.initialize(init_data)
+
+
+def drain(iterator):
+    """Devuelve los elementos restantes de un iterador remoto, pidiéndolos por bloques."""
+    collected = []
+    try:
+        while True:
+            collected.extend(iterator.nextBatch(BATCH_SIZE))
+    except rt.StopIteration:
+        pass
+    return collected
+
+
+def unlink_if_exists(path):
+    """Elimina un archivo, si existe."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -1,49 +1,48 @@
 import unittest
-import uuid
-import socket
 import Ice
 import os
 from RemoteTypes import StopIteration, CancelIteration
 from remotetypes.remoteset import RemoteSet
 from remotetypes.remotelist import RemoteList
 from remotetypes.remotedict import RemoteDict
-
-
-def _get_available_port():
-    """Encuentra un puerto disponible para evitar conflictos."""
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind(("", 0))  # Bind al puerto 0 para que el sistema asigne uno disponible.
-        return s.getsockname()[1]  # Devuelve el puerto asignado
+from remotetypes.iterable import ExhaustedIterable, ListIterator
+from remotetypes._journal import close_journal
+from tests.helpers import STORAGE_DIR, drain, new_communicator, new_id
 
 
 class TestIterable(unittest.TestCase):
     def setUp(self):
         """Setup the test environment for all types."""
-        self.communicator = Ice.initialize([])
+        self.communicator = new_communicator()
 
-        # Usamos el puerto disponible como lo pides
-        port = _get_available_port()
-        self.adapter = self.communicator.createObjectAdapterWithEndpoints("TestAdapter", f"default -p {port}")
+        # Con el puerto 0 es el sistema quien asigna uno disponible
+        self.adapter = self.communicator.createObjectAdapterWithEndpoints("TestAdapter", "default -p 0")
         self.adapter.activate()
 
         # Inicializamos los objetos RemoteSet, RemoteList y RemoteDict
-        self.rset_id = str(uuid.uuid4())
-        self.rset = RemoteSet(self.rset_id)
-        self.rset.add("element1")
-        self.rset.add("element2")
-        self.rset.add("element3")
-
-        self.rlist_id = str(uuid.uuid4())
-        self.rlist = RemoteList(self.rlist_id, "test_rlist.json")
-        self.rlist.append("element1")
-        self.rlist.append("element2")
-        self.rlist.append("element3")
-
-        self.rdict_id = str(uuid.uuid4())
-        self.rdict = RemoteDict(self.rdict_id, "test_rdict.json")
-        self.rdict.setItem("key1", "value1")
-        self.rdict.setItem("key2", "value2")
-        self.rdict.setItem("key3", "value3")
+        self.rset_id = new_id()
+        self.storage_files = [
+            os.path.join(STORAGE_DIR, f'rt-{new_id()}.json') for _ in range(3)
+        ]
+        self.rset = RemoteSet(self.rset_id, self.storage_files[0])
+        with self.rset.batch():
+            self.rset.add("element1")
+            self.rset.add("element2")
+            self.rset.add("element3")
+
+        self.rlist_id = new_id()
+        self.rlist = RemoteList(self.rlist_id, self.storage_files[1])
+        with self.rlist.batch():
+            self.rlist.append("element1")
+            self.rlist.append("element2")
+            self.rlist.append("element3")
+
+        self.rdict_id = new_id()
+        self.rdict = RemoteDict(self.rdict_id, self.storage_files[2])
+        with self.rdict.batch():
+            self.rdict.setItem("key1", "value1")
+            self.rdict.setItem("key2", "value2")
+            self.rdict.setItem("key3", "value3")
 
         # Simulamos el adaptador en el contexto actual para las pruebas
         self.current_context = Ice.Current(adapter=self.adapter)
@@ -52,11 +51,16 @@ class TestIterable(unittest.TestCase):
         """Clean up the test environment."""
         self.adapter.destroy()
         self.communicator.destroy()
+        for container in (self.rset, self.rlist, self.rdict):
+            container.flush()
         # Eliminar archivos de almacenamiento si existen
-        if os.path.exists("test_rlist.json"):
-            os.remove("test_rlist.json")
-        if os.path.exists("test_rdict.json"):
-            os.remove("test_rdict.json")
+        for storage_file in self.storage_files:
+            close_journal(storage_file)
+            for path in (storage_file, storage_file + ".log"):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
 
     def test_iterator(self):
         """Test iterador para RemoteSet, RemoteList y RemoteDict."""
@@ -67,13 +71,46 @@ class TestIterable(unittest.TestCase):
         ]:
             # Crear un iterador para cada tipo
             iterator = collection.iter(current=self.current_context)  # Usar el contexto actual
-            collected_elements = []
-            try:
-                while True:
-                    collected_elements.append(iterator.next())
-            except StopIteration:  # Se espera la excepción StopIteration al final
-                pass
-        self.assertEqual(sorted(collected_elements), sorted(expected))  # Ordena antes de comparar
+            collected_elements = drain(iterator)
+            self.assertCountEqual(collected_elements, expected)  # Sin tener en cuenta el orden
+
+    def test_iterator_next_batch(self):
+        """Verifica que nextBatch devuelva los elementos en bloques y StopIteration al final."""
+        iterator = self.rlist.iter(current=self.current_context)
+        self.assertEqual(iterator.nextBatch(2), ["element1", "element2"])
+        self.assertEqual(iterator.nextBatch(2), ["element3"])
+        with self.assertRaises(StopIteration):
+            iterator.nextBatch(2)
+
+    def test_exhausted_iterator_is_released(self):
+        """Verifica que un iterador agotado se retire del adaptador y siga lanzando StopIteration."""
+        iterator = self.rlist.iter(current=self.current_context)
+        iterator.nextBatch(3)
+        with self.assertRaises(StopIteration):
+            iterator.next()
+        # La identidad retirada la atiende el sirviente por defecto de los iteradores agotados
+        self.assertIsInstance(self.adapter.find(iterator.ice_getIdentity()), ExhaustedIterable)
+        with self.assertRaises(StopIteration):
+            iterator.next()
+        with self.assertRaises(StopIteration):
+            iterator.nextBatch(3)
+
+        # El iterador retirado no conserva referencias a la lista y se reutiliza
+        pooled = ListIterator._pool[-1]
+        self.assertIsNone(pooled._owner)
+        self.assertIsNone(pooled._iterator)
+        iterator = self.rlist.iter(current=self.current_context)
+        self.assertIs(self.adapter.find(iterator.ice_getIdentity()), pooled)
+        self.assertEqual(iterator.nextBatch(3), ["element1", "element2", "element3"])
+
+    def test_new_iterator_sees_modifications(self):
+        """Verifica que un iterador creado tras modificar el objeto recorra los datos actuales."""
+        iterator = self.rlist.iter(current=self.current_context)
+        self.rlist.append("element4")
+        with self.assertRaises(CancelIteration):
+            iterator.nextBatch(4)
+        iterator = self.rlist.iter(current=self.current_context)
+        self.assertEqual(drain(iterator), ["element1", "element2", "element3", "element4"])
 
     def test_iterator_stop_iteration(self):
         """Verifica que se lance StopIteration correctamente al final de la iteración."""
@@ -91,6 +128,18 @@ class TestIterable(unittest.TestCase):
         with self.assertRaises(CancelIteration):
             iterator.next()
 
+    def test_iterator_cancel_iteration_list_and_dict(self):
+        """Verifica que se levante CancelIteration si se modifica la lista o el diccionario."""
+        list_iterator = self.rlist.iter(current=self.current_context)
+        self.rlist.append("new_element")
+        with self.assertRaises(CancelIteration):
+            list_iterator.next()
+
+        dict_iterator = self.rdict.iter(current=self.current_context)
+        self.rdict.setItem("new_key", "new_value")
+        with self.assertRaises(CancelIteration):
+            dict_iterator.next()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import os
+from remotetypes import serialization
+from remotetypes._filestore import flush_writes
+from remotetypes._journal import Journal
+from remotetypes.remoteset import _apply_set_op, _encode_set
+from tests.helpers import STORAGE_DIR, new_id
+
+
+class TestJournal(unittest.TestCase):
+    """Pruebas de la instantánea y el diario de operaciones de un archivo de almacenamiento."""
+
+    def setUp(self):
+        """Prepara una ruta de almacenamiento nueva para cada prueba."""
+        self.storage_file = os.path.join(STORAGE_DIR, f'rt-{new_id()}.json')
+
+    def tearDown(self):
+        """Elimina la instantánea y el diario generados."""
+        flush_writes()
+        for path in (self.storage_file, self.storage_file + ".log"):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def _open(self):
+        """Abre un diario nuevo, que solo conoce lo que haya en el disco."""
+        return Journal(self.storage_file, _apply_set_op, _encode_set)
+
+    def test_replay_snapshot_and_log(self):
+        """Reconstruye los datos a partir de la instantánea y del diario del disco."""
+        with open(self.storage_file, "wb") as file:
+            file.write(serialization.dumps({"a": ["x", "y"], "b": ["z"]}))
+        with open(self.storage_file + ".log", "wb") as file:
+            file.write(b'["a",["remove","x"]]\n["a",["add","w"]]\n["c",["add","v"]]\n')
+
+        journal = self._open()
+        self.assertCountEqual(journal.load("a"), ["y", "w"])
+        self.assertCountEqual(journal.load("b"), ["z"])
+        self.assertCountEqual(journal.load("c"), ["v"])
+        self.assertEqual(journal.load("d"), [])
+
+    def test_recorded_ops_survive_reopen(self):
+        """Las operaciones anotadas se recuperan al abrir otro diario sobre los mismos archivos."""
+        journal = self._open()
+        journal.record("a", [["add", "x"], ["add", "y"], ["remove", "x"]])
+        flush_writes()
+
+        self.assertEqual(self._open().load("a"), ["y"])
+
+    def test_compaction_writes_snapshot(self):
+        """Al compactar, la instantánea recoge el estado actual y el diario desaparece."""
+        with open(self.storage_file, "wb") as file:
+            file.write(serialization.dumps({"a": ["x"]}))
+        journal = self._open()
+        journal.record("a", [["add", "y"]])
+        journal.record("b", [["add", "z"], ["remove", "z"], ["add", "w"]])
+        journal.compact()
+        flush_writes()
+
+        self.assertFalse(os.path.exists(self.storage_file + ".log"))
+        with open(self.storage_file, "rb") as file:
+            snapshot = serialization.loads(file.read())
+        self.assertEqual(snapshot.keys(), {"a", "b"})
+        self.assertCountEqual(snapshot["a"], ["x", "y"])
+        self.assertEqual(snapshot["b"], ["w"])
+        self.assertCountEqual(self._open().load("a"), ["x", "y"])
+
+    def test_load_rereads_changed_files(self):
+        """Si los archivos cambian o desaparecen fuera del proceso, se vuelven a leer."""
+        journal = self._open()
+        journal.record("a", [["add", "x"]])
+        flush_writes()
+
+        with open(self.storage_file, "wb") as file:
+            file.write(serialization.dumps({"a": ["nuevo"]}))
+        os.unlink(self.storage_file + ".log")
+        self.assertEqual(journal.load("a"), ["nuevo"])
+
+        os.unlink(self.storage_file)
+        self.assertEqual(journal.load("a"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+import tempfile
+import unittest
+from unittest import mock
+import Ice
+import kafka_client
+from remotetypes import RemoteTypes as rt
+from remotetypes import serialization
+from remotetypes.factory import Factory
+from remotetypes._journal import close_journal
+from tests.helpers import new_communicator, new_id
+
+
+class _StopLoop(Exception):
+    """Termina el bucle de consumo en las pruebas."""
+
+
+class _FakeMessage:
+    """Mensaje de Kafka con un valor y una clave fijos."""
+
+    def __init__(self, value, key=b"k"):
+        self._value = value
+        self._key = key
+
+    def error(self):
+        return None
+
+    def value(self):
+        return self._value
+
+    def key(self):
+        return self._key
+
+
+class _FakeConsumer:
+    """Consumidor que entrega una vez los mensajes indicados y después detiene el bucle."""
+
+    def __init__(self, messages):
+        self._messages = messages
+
+    def consume(self, num_messages, timeout):
+        if self._messages is None:
+            raise _StopLoop()
+        messages, self._messages = self._messages, None
+        return messages
+
+
+class _FakeProducer:
+    """Productor que guarda los mensajes publicados."""
+
+    def __init__(self):
+        self.produced = []
+
+    def produce(self, topic, value, key, on_delivery):
+        self.produced.append((key, serialization.loads(value)))
+
+    def poll(self, timeout):
+        return 0
+
+    def flush(self):
+        return 0
+
+
+class TestKafkaClient(unittest.TestCase):
+    """Pruebas de `hacer_evento` y `esperar_evento` contra una factoría real en un adaptador local."""
+
+    def setUp(self):
+        """Publica una factoría en un adaptador local y obtiene su proxy."""
+        # Los archivos de persistencia de la factoría se guardan en un directorio temporal
+        storage_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(storage_dir.cleanup)
+        patcher = mock.patch.object(Factory, "STORAGE_PATH", storage_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.communicator = new_communicator()
+        # Con el puerto 0 es el sistema quien asigna uno disponible
+        self.adapter = self.communicator.createObjectAdapterWithEndpoints("TestAdapter", "default -p 0")
+        self.adapter.activate()
+        self.factory = Factory()
+        proxy = self.adapter.add(self.factory, Ice.stringToIdentity("factory"))
+        self.factory_prx = rt.FactoryPrx.uncheckedCast(proxy)
+
+    def tearDown(self):
+        """Vacía la caché de proxies y destruye el adaptador y el comunicador."""
+        kafka_client._cached_rtype_proxy.cache_clear()
+        # Los cambios pendientes se guardan antes de borrar el directorio temporal
+        for proxies in self.factory._proxies.values():
+            for proxy in proxies.values():
+                servant = self.adapter.find(proxy.ice_getIdentity())
+                servant.flush()
+                close_journal(servant.storage_file)
+        self.adapter.destroy()
+        self.communicator.destroy()
+
+    def _run(self, event):
+        """Lanza un evento y espera su respuesta, devolviendo (resultado, error)."""
+        future, error = kafka_client.hacer_evento(self.factory_prx, event)
+        if future is None:
+            return None, error
+        return kafka_client.esperar_evento(future)
+
+    def _event(self, object_type, identifier, operation, **args):
+        """Construye un evento con los argumentos indicados."""
+        event = {
+            "id": new_id(),
+            "object_type": object_type,
+            "object_identifier": identifier,
+            "operation": operation,
+        }
+        if args:
+            event["args"] = args
+        return event
+
+    def _new_list(self, *items):
+        """Crea una lista remota con los elementos indicados y devuelve su identificador."""
+        identifier = new_id()
+        for item in items:
+            self.assertEqual(self._run(self._event("RList", identifier, "append", item=item)), (None, None))
+        return identifier
+
+    def test_list_pop_without_index(self):
+        """pop sin índice devuelve el último elemento de la lista."""
+        identifier = self._new_list("a", "b", "c")
+        self.assertEqual(self._run(self._event("RList", identifier, "pop")), ("c", None))
+        self.assertEqual(self._run(self._event("RList", identifier, "length")), (2, None))
+
+    def test_list_pop_with_index(self):
+        """pop con índice devuelve el elemento de esa posición."""
+        identifier = self._new_list("a", "b", "c")
+        self.assertEqual(self._run(self._event("RList", identifier, "pop", index=0)), ("a", None))
+        self.assertEqual(self._run(self._event("RList", identifier, "getItem", index=0)), ("b", None))
+
+    def test_list_pop_invalid_index(self):
+        """pop con un índice fuera de rango o que no es entero devuelve un error."""
+        identifier = self._new_list("a")
+        self.assertEqual(self._run(self._event("RList", identifier, "pop", index=5)), (None, "IndexError"))
+        _, error = self._run(self._event("RList", identifier, "pop", index="0"))
+        self.assertEqual(error, "Invalid argument type for index: Expected int")
+
+    def test_dict_missing_key(self):
+        """getItem de una clave inexistente devuelve KeyError."""
+        identifier = new_id()
+        self._run(self._event("RDict", identifier, "setItem", key="k", item="v"))
+        self.assertEqual(self._run(self._event("RDict", identifier, "getItem", key="k")), ("v", None))
+        self.assertEqual(self._run(self._event("RDict", identifier, "getItem", key="x")), (None, "KeyError"))
+
+    def test_retry_after_server_restart(self):
+        """Si el objeto cacheado ya no existe, se pide de nuevo a la factoría y se reintenta."""
+        identifier = self._new_list("a")
+        # Simula un reinicio del servidor: los objetos se registran con identidades nuevas
+        for proxy in self.factory._proxies[rt.TypeName.RList].values():
+            servant = self.adapter.remove(proxy.ice_getIdentity())
+            servant.flush()
+            close_journal(servant.storage_file)
+        self.factory._proxies[rt.TypeName.RList].clear()
+
+        event = self._event("RList", identifier, "append", item="b")
+        future, error = kafka_client.hacer_evento(self.factory_prx, event)
+        self.assertIsNone(error)
+        result = kafka_client.esperar_evento_con_reintento(self.factory_prx, event, future)
+        self.assertEqual(result, (None, None))
+        self.assertEqual(self._run(self._event("RList", identifier, "length")), (2, None))
+
+    def test_unknown_object_type(self):
+        """Un tipo de objeto desconocido devuelve UnknownObjectType."""
+        result = self._run(self._event("RQueue", new_id(), "length"))
+        self.assertEqual(result, (None, "UnknownObjectType"))
+
+    def test_unsupported_operation(self):
+        """Una operación que no existe para el tipo devuelve OperationNotSupported."""
+        result = self._run(self._event("RSet", new_id(), "append", item="a"))
+        self.assertEqual(result, (None, "OperationNotSupported"))
+
+    def test_malformed_event(self):
+        """Un evento sin campos obligatorios o con args inválidos se rechaza."""
+        self.assertEqual(self._run({"id": new_id(), "object_type": "RSet"}), (None, "MalformedOperation"))
+        event = self._event("RSet", new_id(), "length")
+        event["args"] = ["a"]
+        self.assertEqual(self._run(event), (None, "InvalidArgs"))
+        for not_an_event in ("notadict", 1, ["x"], None):
+            self.assertEqual(self._run(not_an_event), (None, "MalformedOperation"))
+
+    def test_batch_skips_operations_that_are_not_objects(self):
+        """Las operaciones que no son objetos se descartan sin detener el lote."""
+        identifier = new_id()
+        ops = [1, "x", self._event("RSet", identifier, "add", item="a"), None,
+               self._event("RSet", identifier, "length")]
+        consumer = _FakeConsumer([_FakeMessage(serialization.dumps(ops))])
+        producer = _FakeProducer()
+        with self.assertRaises(_StopLoop):
+            kafka_client.consume_and_process_messages(
+                consumer, producer, self.factory_prx, {"kafka_output_topic": "out"}
+            )
+        [(key, responses)] = producer.produced
+        self.assertEqual(key, b"k")
+        self.assertEqual(
+            responses,
+            [{"id": ops[2]["id"], "status": "ok"}, {"id": ops[4]["id"], "status": "ok", "result": 1}],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
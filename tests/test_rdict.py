@@ -1,54 +1,69 @@
+import json
+import os
+import shutil
 import unittest
-import uuid
 import Ice
 import tempfile
-import json
-import RemoteTypes as rt  # Asegúrate de que este import esté presente.
 from remotetypes.remotedict import RemoteDict
+from remotetypes._journal import close_journal
 from RemoteTypes import KeyError as RemoteKeyError
 from RemoteTypes import CancelIteration
+from tests.helpers import STORAGE_DIR, drain, new_communicator, new_id, unlink_if_exists
 
 KEY = 'clave_prueba'
 VALUE = 'valor_prueba'
 OTRA_CLAVE = 'otra_clave'
 OTRO_VALOR = 'otro_valor'
 CLAVE_INVALIDA = 'clave_invalida'
+EXPECTED_KV = frozenset({"clave_prueba: valor_prueba", "otra_clave: otro_valor"})
+
 
 class TestRemoteDict(unittest.TestCase):
     """Casos de prueba para la clase RemoteDict."""
 
-    def setUp(self):
-        """Configuración inicial para cada prueba."""
-        # Crear un archivo temporal para el almacenamiento
-        self.temp_file = tempfile.NamedTemporaryFile(delete=False)
-        self.storage_file = self.temp_file.name
-        self.temp_file.close()  # Cerrar el archivo temporal
+    @classmethod
+    def setUpClass(cls):
+        """Crea una sola vez el archivo JSON vacío y el adaptador que comparten todas las pruebas."""
+        fd, cls._template_path = tempfile.mkstemp(suffix=".json", dir=STORAGE_DIR)
+        with open(fd, 'wb') as file:
+            file.write(b'{}')
 
-        # Inicializar el archivo JSON con un objeto vacío
-        with open(self.storage_file, 'w') as file:
-            json.dump({}, file)
-
-        # Inicializar el comunicador y el adaptador
-        self.communicator = Ice.initialize([])
-        self.adapter = self.communicator.createObjectAdapterWithEndpoints(f"TestAdapter-{uuid.uuid4()}", "default -p 0")
-        self.adapter.activate()
+        # Todas las pruebas comparten el comunicador y el adaptador
+        cls.communicator = new_communicator()
+        cls.adapter = cls.communicator.createObjectAdapterWithEndpoints("TestAdapter", "default -p 0")
+        cls.adapter.activate()
 
         # Crear el objeto Current de Ice
-        self.current = Ice.Current()
-        self.current.adapter = self.adapter
+        cls.current = Ice.Current(adapter=cls.adapter)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Destruye el comunicador y elimina el archivo JSON de plantilla."""
+        cls.adapter.destroy()
+        cls.communicator.destroy()
+        os.remove(cls._template_path)
+
+    def setUp(self):
+        """Configuración inicial para cada prueba."""
+        # Crear el archivo de almacenamiento copiando la plantilla con un objeto vacío
+        self.storage_file = os.path.join(STORAGE_DIR, f'rt-{new_id()}.json')
+        shutil.copyfile(self._template_path, self.storage_file)
 
         # Crear la instancia de RemoteDict
-        self.rdict = RemoteDict(identifier=str(uuid.uuid4()), storage_file=self.storage_file)
-        self.adapter.add(self.rdict, Ice.stringToIdentity(self.rdict.id_))
+        self.rdict = RemoteDict(identifier=new_id(), storage_file=self.storage_file)
+        self.adapter.add(self.rdict, Ice.Identity(name=self.rdict.id_, category=""))
 
 
-    # def tearDown(self):
-    #     """Limpieza después de cada prueba."""
-    #     self.adapter.destroy()
-    #     self.communicator.destroy()
-    #     # Eliminar el archivo temporal
-    #     if os.path.exists(self.storage_file):
-    #         os.remove(self.storage_file)
+    def tearDown(self):
+        """Limpieza después de cada prueba."""
+        self.rdict.flush()
+        close_journal(self.storage_file)
+        # Eliminar el archivo temporal y su diario
+        for path in (self.storage_file, self.storage_file + ".log"):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
 
     def test_setItem_and_getItem(self):
         """1.8, 1.10.1, 1.10.2: setItem permite recuperar el valor con getItem y mantiene el valor."""
@@ -102,6 +117,14 @@ class TestRemoteDict(unittest.TestCase):
         self.rdict.setItem(OTRA_CLAVE, OTRO_VALOR)
         self.assertNotEqual(self.rdict.hash(), hash_value)
 
+    def test_hash_restored_after_setItem_and_remove(self):
+        """1.6 y 1.7: hash vuelve al valor inicial si se deshace la modificación."""
+        self.rdict.setItem(KEY, VALUE)
+        hash_value = self.rdict.hash()
+        self.rdict.setItem(OTRA_CLAVE, OTRO_VALOR)
+        self.rdict.remove(OTRA_CLAVE)
+        self.assertEqual(self.rdict.hash(), hash_value)
+
     def test_pop_existing_key(self):
         """1.12.1 y 1.12.2: pop devuelve el valor y elimina la clave."""
         self.rdict.setItem(KEY, VALUE)
@@ -117,17 +140,11 @@ class TestRemoteDict(unittest.TestCase):
 
     def test_iterator_traverses_all_keys(self):
         """Prueba que el iterador recorre todas las claves y valores formateados."""
-        keys_values = {"clave_prueba: valor_prueba", "otra_clave: otro_valor"}
-        self.rdict.setItem("clave_prueba", "valor_prueba")
-        self.rdict.setItem("otra_clave", "otro_valor")
+        with self.rdict.batch():
+            self.rdict.setItem("clave_prueba", "valor_prueba")
+            self.rdict.setItem("otra_clave", "otro_valor")
         iterator = self.rdict.iter(current=self.current)
-        collected_items = set()
-        while True:
-            try:
-                collected_items.add(iterator.next())
-            except rt.StopIteration:
-                break
-        self.assertEqual(collected_items, keys_values)
+        self.assertCountEqual(drain(iterator), EXPECTED_KV)
 
 
     def test_iterator_raises_CancelIteration_if_dict_modified(self):
@@ -137,3 +154,29 @@ class TestRemoteDict(unittest.TestCase):
         self.rdict.setItem(OTRA_CLAVE, OTRO_VALOR)  # Modifica el diccionario
         with self.assertRaises(CancelIteration):
             iterator.next()
+
+    def test_loads_legacy_flat_file(self):
+        """Prueba que un archivo con el formato antiguo `{clave: valor}` se carga y se convierte."""
+        legacy_file = os.path.join(STORAGE_DIR, f'rt-{new_id()}.json')
+        with open(legacy_file, 'w') as file:
+            json.dump({KEY: VALUE, OTRA_CLAVE: OTRO_VALOR}, file, indent=4)
+        for path in (legacy_file, legacy_file + ".log"):
+            self.addCleanup(unlink_if_exists, path)
+        self.addCleanup(close_journal, legacy_file)
+
+        identifier = new_id()
+        rdict = RemoteDict(identifier, legacy_file)
+        self.assertEqual(rdict.getItem(KEY), VALUE)
+        self.assertEqual(rdict.getItem(OTRA_CLAVE), OTRO_VALOR)
+
+        # La instantánea se reescribe con el formato actual, por identificador
+        rdict.remove(OTRA_CLAVE)
+        rdict.flush()
+        with open(legacy_file) as file:
+            self.assertEqual(json.load(file), {identifier: {KEY: VALUE, OTRA_CLAVE: OTRO_VALOR}})
+
+        # Sin el diario en memoria, los datos se leen de nuevo del disco
+        close_journal(legacy_file)
+        reloaded = RemoteDict(identifier, legacy_file)
+        self.assertEqual(reloaded.length(), 1)
+        self.assertEqual(reloaded.getItem(KEY), VALUE)
@@ -1,15 +1,16 @@
+import json
 import os
+import tempfile
 import unittest
-import uuid
 from remotetypes.remotelist import RemoteList
 from RemoteTypes import KeyError as RemoteKeyError, IndexError as RemoteIndexError
+from tests.helpers import STORAGE_DIR, new_id
 
 
 ITEM = 'elemento_prueba'
 OTRO_ITEM = 'otro_elemento'
 ITEM_INVALIDO = 'elemento_invalido'
 INDICE_INVALIDO = 10
-TEMP_STORAGE_FILE = "test_remotelist.json"
 
 
 class TestRemoteList(unittest.TestCase):
@@ -17,15 +18,19 @@ class TestRemoteList(unittest.TestCase):
 
     def setUp(self):
         """Configura el entorno de prueba."""
-        # Limpiar archivo de persistencia antes de cada prueba
-        if os.path.exists(TEMP_STORAGE_FILE):
-            os.remove(TEMP_STORAGE_FILE)
-        self.rlist = RemoteList(identifier=str(uuid.uuid4()), storage_file=TEMP_STORAGE_FILE)
+        # Cada prueba guarda sus datos en un archivo de persistencia propio,
+        # creado de forma atómica para poder ejecutar las pruebas en paralelo
+        fd, self.storage_file = tempfile.mkstemp(suffix='.json', dir=STORAGE_DIR)
+        os.close(fd)
+        self.rlist = RemoteList(identifier=new_id(), storage_file=self.storage_file)
 
     def tearDown(self):
         """Limpieza después de cada prueba."""
-        if os.path.exists(TEMP_STORAGE_FILE):
-            os.remove(TEMP_STORAGE_FILE)
+        self.rlist.flush()
+        try:
+            os.unlink(self.storage_file)
+        except FileNotFoundError:
+            pass
 
     def test_remove_existing_item(self):
         """2.1 RList.remove borra un elemento por valor existente."""
@@ -66,35 +71,32 @@ class TestRemoteList(unittest.TestCase):
         self.rlist.append(OTRO_ITEM)
         self.assertNotEqual(self.rlist.hash(), valor_hash_inicial)
 
+    def test_hash_restored_after_append_and_pop(self):
+        """2.6 RList.hash vuelve al valor inicial si se deshace la modificación."""
+        self.rlist.append(ITEM)
+        valor_hash_inicial = self.rlist.hash()
+        self.rlist.append(OTRO_ITEM)
+        self.rlist.pop()
+        self.assertEqual(self.rlist.hash(), valor_hash_inicial)
+
     def test_append_adds_item_to_end(self):
         """2.8 RList.append añade un elemento al final."""
         self.rlist.append(ITEM)
         self.assertEqual(self.rlist.getItem(0), ITEM)
 
-    def test_pop_returns_last_item(self):
-        """2.9.1 RList.pop devuelve un elemento del final."""
+    def test_pop_returns_and_removes_last_item(self):
+        """2.9.1 y 2.9.2 RList.pop devuelve y elimina el elemento del final."""
         self.rlist.append(ITEM)
         resultado = self.rlist.pop()
         self.assertEqual(resultado, ITEM)
-
-    def test_pop_removes_last_item(self):
-        """2.9.2 RList.pop elimina el elemento del final."""
-        self.rlist.append(ITEM)
-        self.rlist.pop()
         self.assertEqual(self.rlist.length(), 0)
 
-    def test_pop_with_index_returns_item(self):
-        """2.10.1 RList.pop devuelve el elemento de la posición indicada."""
+    def test_pop_with_index_returns_and_removes_item(self):
+        """2.10.1 y 2.10.2 RList.pop devuelve y elimina el elemento de la posición indicada."""
         self.rlist.append(ITEM)
         self.rlist.append(OTRO_ITEM)
         resultado = self.rlist.pop(0)
         self.assertEqual(resultado, ITEM)
-
-    def test_pop_with_index_removes_item(self):
-        """2.10.2 RList.pop elimina el elemento de la posición indicada."""
-        self.rlist.append(ITEM)
-        self.rlist.append(OTRO_ITEM)
-        self.rlist.pop(0)
         self.assertEqual(self.rlist.getItem(0), OTRO_ITEM)
 
     def test_pop_with_invalid_index_raises_IndexError(self):
@@ -119,6 +121,19 @@ class TestRemoteList(unittest.TestCase):
         with self.assertRaises(RemoteIndexError):
             self.rlist.getItem(INDICE_INVALIDO)
 
+    def test_lists_sharing_storage_file_are_all_saved(self):
+        """Las listas que comparten archivo de persistencia guardan todos sus elementos."""
+        otra_lista = RemoteList(identifier=new_id(), storage_file=self.storage_file)
+        self.rlist.append(ITEM)
+        otra_lista.append(OTRO_ITEM)
+        self.rlist.flush()
+        otra_lista.flush()
+
+        with open(self.storage_file) as file:
+            datos = json.load(file)
+        self.assertEqual(datos[self.rlist.id_], [ITEM])
+        self.assertEqual(datos[otra_lista.id_], [OTRO_ITEM])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,18 +1,15 @@
+import json
 import unittest
-import uuid
 import os
-import socket
+from unittest import mock
 import Ice
 import RemoteTypes as rt
 from RemoteTypes import StopIteration, CancelIteration
 from remotetypes.remoteset import RemoteSet
+from remotetypes._journal import close_journal
+from tests.helpers import STORAGE_DIR, drain, new_communicator, new_id, unlink_if_exists
 
-
-def _get_available_port():
-    """Encuentra un puerto disponible para evitar conflictos."""
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind(("", 0))  # Bind al puerto 0 para que el sistema asigne uno disponible.
-        return s.getsockname()[1]  # Devuelve el puerto asignado
+EXPECTED_ELEMENTS = frozenset({"element1", "element2", "element3"})
 
 
 class TestRemoteSet(unittest.TestCase):
@@ -24,24 +21,38 @@ class TestRemoteSet(unittest.TestCase):
     inexistentes.
     """
 
-    def setUp(self):
-        """Configura el entorno de prueba para RemoteSet."""
-        port = _get_available_port()
-        self.communicator = Ice.initialize([])
-        self.adapter = self.communicator.createObjectAdapterWithEndpoints("TestAdapter", f"default -p {port}")
-        self.adapter.activate()
-
-        # Inicializamos los objetos RemoteSet
-        self.identifier = str(uuid.uuid4())
-        self.rset = RemoteSet(self.identifier)
+    @classmethod
+    def setUpClass(cls):
+        """Crea el comunicador y el adaptador que comparten todas las pruebas."""
+        cls.communicator = new_communicator()
+        cls.adapter = cls.communicator.createObjectAdapterWithEndpoints("TestAdapter", "default -p 0")
+        cls.adapter.activate()
 
         # Simulamos el adaptador en el contexto actual para las pruebas
-        self.current_context = Ice.Current(adapter=self.adapter)
+        cls.current_context = Ice.Current(adapter=cls.adapter)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Destruye el adaptador y el comunicador compartidos."""
+        cls.adapter.destroy()
+        cls.communicator.destroy()
+
+    def setUp(self):
+        """Configura el entorno de prueba para RemoteSet."""
+        # Cada prueba usa un RemoteSet nuevo con su propio identificador
+        self.identifier = new_id()
+        self.storage_file = os.path.join(STORAGE_DIR, f'rt-{new_id()}.json')
+        self.rset = RemoteSet(self.identifier, self.storage_file)
 
     def tearDown(self):
         """Limpia los archivos generados durante las pruebas."""
-        if os.path.exists(RemoteSet.GLOBAL_STORAGE_FILE):
-            os.remove(RemoteSet.GLOBAL_STORAGE_FILE)
+        self.rset.flush()
+        close_journal(self.storage_file)
+        for path in (self.storage_file, self.storage_file + ".log"):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
 
     def test_add_item(self):
         """3.8.1: Añade un elemento al conjunto."""
@@ -58,13 +69,53 @@ class TestRemoteSet(unittest.TestCase):
 
     def test_persistence(self):
         """3.3: Persiste los datos correctamente."""
-        self.rset.add("item1")
-        self.rset.add("item2")
-        new_rset = RemoteSet(self.identifier)  
+        with self.rset.batch():
+            self.rset.add("item1")
+            self.rset.add("item2")
+        self.rset.flush()
+        # Sin el diario en memoria, el nuevo conjunto se carga desde el disco
+        close_journal(self.storage_file)
+        new_rset = RemoteSet(self.identifier, self.storage_file)
         self.assertTrue(new_rset.contains("item1"))
         self.assertTrue(new_rset.contains("item2"))
         self.assertEqual(new_rset.length(), 2)
 
+    def test_batch_saves_on_exit(self):
+        """3.3: Las modificaciones de un bloque batch() se guardan al salir de él."""
+        with self.rset.batch():
+            self.rset.add("item1")
+            self.rset.add("item2")
+            self.assertFalse(os.path.exists(self.storage_file + ".log"))
+        close_journal(self.storage_file)
+        new_rset = RemoteSet(self.identifier, self.storage_file)
+        self.assertEqual(new_rset.length(), 2)
+
+    def test_imports_data_from_global_file(self):
+        """Un conjunto con archivo propio recupera los datos que tenía en el archivo global."""
+        global_file = os.path.join(STORAGE_DIR, f'rt-{new_id()}.json')
+        with open(global_file, 'w') as file:
+            json.dump({self.identifier: ["item1", "item2"], new_id(): ["otro"]}, file, indent=4)
+        self.addCleanup(unlink_if_exists, global_file)
+        self.addCleanup(close_journal, global_file)
+        patcher = mock.patch.object(RemoteSet, "GLOBAL_STORAGE_FILE", global_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        storage_file = os.path.join(STORAGE_DIR, f'rt-{new_id()}.json')
+        for path in (storage_file, storage_file + ".log"):
+            self.addCleanup(unlink_if_exists, path)
+        self.addCleanup(close_journal, storage_file)
+        rset = RemoteSet(self.identifier, storage_file)
+        self.assertEqual(rset.length(), 2)
+        self.assertTrue(rset.contains("item1"))
+        self.assertTrue(rset.contains("item2"))
+
+        # Los datos quedan guardados en el archivo propio del conjunto
+        rset.flush()
+        os.unlink(global_file)
+        close_journal(storage_file)
+        self.assertEqual(RemoteSet(self.identifier, storage_file).length(), 2)
+
     def test_remove_nonexistent_item(self):
         """3.2: Lanza KeyError si se intenta borrar un elemento inexistente."""
         with self.assertRaises(rt.KeyError):
@@ -94,22 +145,23 @@ class TestRemoteSet(unittest.TestCase):
         self.rset.add("item2")
         self.assertNotEqual(original_hash, self.rset.hash())
 
+    def test_hash_restored_after_add_and_remove(self):
+        """3.6 y 3.7: El hash vuelve al valor inicial si se deshace la modificación."""
+        self.rset.add("item1")
+        original_hash = self.rset.hash()
+        self.rset.add("item2")
+        self.rset.remove("item2")
+        self.assertEqual(original_hash, self.rset.hash())
+
     def test_iterator(self):
         """Test iterador para RemoteSet."""
-        self.rset.add("element1")
-        self.rset.add("element2")
-        self.rset.add("element3")
+        with self.rset.batch():
+            self.rset.add("element1")
+            self.rset.add("element2")
+            self.rset.add("element3")
 
-        iterator = self.rset.iter(current=self.current_context) 
-        collected_elements = []
-
-        try:
-            while True:
-                collected_elements.append(iterator.next())
-        except StopIteration:
-            pass 
-
-        self.assertEqual(set(collected_elements), {"element1", "element2", "element3"})
+        iterator = self.rset.iter(current=self.current_context)
+        self.assertCountEqual(drain(iterator), EXPECTED_ELEMENTS)
 
     def test_iterator_stop_iteration(self):
         """Verifica que se lance StopIteration correctamente al final de la iteración."""
@@ -125,5 +177,6 @@ class TestRemoteSet(unittest.TestCase):
         with self.assertRaises(CancelIteration):
             iterator.next()
 
+
 if __name__ == "__main__":
     unittest.main()
@@ -23,6 +23,11 @@ class TestStringSet(unittest.TestCase):
         with self.assertRaises(ValueError):
             StringSet([NON_STRING_VALUE])
 
+    def test_upper_case_instantiation(self):
+        """Check initialisation with force_upper_case stores upper case values."""
+        a = StringSet([STRING_VALUE], force_upper_case=True)
+        self.assertEqual(set(a), {STRING_VALUE.upper()})
+
     def test_add_string_value(self):
         """Check adding a str value to the StringSet."""
         a = StringSet()
@@ -33,3 +38,17 @@ class TestStringSet(unittest.TestCase):
         a = StringSet()
         with self.assertRaises(ValueError):
             a.add(NON_STRING_VALUE)
+
+    def test_contains_upper_case(self):
+        """Check membership ignores case when force_upper_case is set."""
+        a = StringSet(force_upper_case=True)
+        a.add(STRING_VALUE)
+        self.assertIn(STRING_VALUE, a)
+        self.assertIn(STRING_VALUE.upper(), a)
+
+    def test_contains_no_string_value(self):
+        """Check non-str values are not converted when checking membership."""
+        a = StringSet([str(NON_STRING_VALUE)])
+        self.assertNotIn(NON_STRING_VALUE, a)
+        with self.assertRaises(TypeError):
+            NON_STRING_VALUE in StringSet(force_upper_case=True)